@@ -252,7 +252,10 @@ def _on_undo_pre(scene):
 
 
 def _load_post_invalidate_storage(_dummy):
+    from .stats import rna_analysis
     from .utils.compat import invalidate_cache
+    # Per-run RNA memos left by a cancelled scan key data-blocks by pointer
+    rna_analysis.invalidate_cache()
     invalidate_cache()
 
 
@@ -281,6 +284,9 @@ def unregister():
         bpy.app.handlers.undo_pre.remove(_on_undo_pre)
     if _load_post_invalidate_storage in bpy.app.handlers.load_post:
         bpy.app.handlers.load_post.remove(_load_post_invalidate_storage)
+    # Drop per-run RNA memos a cancelled scan may have left behind
+    from .stats import rna_analysis
+    rna_analysis.invalidate_cache()
     
     # atomic package unregistration
     ui.unregister()
@@ -161,6 +161,8 @@ def _invalidate_cache():
     # Clear RNA graph cache if it exists
     if hasattr(_process_unified_scan_step, '_rna_graph'):
         delattr(_process_unified_scan_step, '_rna_graph')
+    from ..stats import rna_analysis
+    rna_analysis.invalidate_cache()
     # Optionally clear disk cache on invalidation
     # (We keep it for now to allow cache reuse across sessions)
 
@@ -381,9 +383,11 @@ class ATOMIC_OT_clear_cache(bpy.types.Operator):
     bl_description = "Manually clear the unused data cache. This forces a fresh scan on the next Smart Select or Clean operation"
 
     def execute(self, context):
+        from ..stats import rna_analysis
         _invalidate_cache()
         _cleanup_old_job_files()
-        config.debug_print("[Atomic Debug] Cache cleared manually, old job files cleaned up")
+        rna_analysis.clear_graph_cache()
+        config.debug_print("[Atomic Debug] Cache cleared manually, old job files and graph cache cleaned up")
         return {'FINISHED'}
 
 
@@ -1246,12 +1250,14 @@ def _process_unified_scan_step():
                     config.debug_print("[Atomic Debug] Unified Scanner: File changed, rebuilding RNA dependency graph...")
                 else:
                     config.debug_print("[Atomic Debug] Unified Scanner: Building RNA dependency graph...")
-                # Always dump RNA data to file for debugging/verification
-                rna_dump_path = os.path.join(tempfile.gettempdir(), f"atomic_rna_dump_{int(time.time())}.json")
-                rna_data = rna_analysis.dump_rna_references(output_path=rna_dump_path)
                 if config.enable_debug_prints:
+                    # Dump RNA data to file for debugging/verification
+                    rna_dump_path = os.path.join(tempfile.gettempdir(), f"atomic_rna_dump_{int(time.time())}.json")
+                    rna_data = rna_analysis.dump_rna_references(output_path=rna_dump_path, pretty=True)
                     config.debug_print(f"[Atomic Debug] Unified Scanner: RNA data dumped to {rna_dump_path}")
-                _process_unified_scan_step._rna_graph = rna_analysis.build_dependency_graph(rna_data)
+                    _process_unified_scan_step._rna_graph = rna_analysis.build_dependency_graph(rna_data)
+                else:
+                    _process_unified_scan_step._rna_graph = rna_analysis.get_or_build_graph()
                 _process_unified_scan_step._rna_graph_filepath = current_filepath
                 config.debug_print("[Atomic Debug] Unified Scanner: RNA dependency graph built")
             
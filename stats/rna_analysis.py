@@ -24,20 +24,120 @@ Uses Blender's RNA introspection system to build a dependency graph.
 """
 
 import bpy
+import hashlib
 import json
 import os
+import sys
+from collections import defaultdict, deque
 from .. import config
 from ..utils import compat
 from . import ghost_users
 
+# orjson isn't bundled with Blender but is much faster when present
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 # Data-block types we care about for dependency analysis
 # Note: We rebuild this dynamically in get_data_block_types() to avoid stale references
 # after opening a new blend file
-_DATA_BLOCK_TYPE_NAMES = [
+_DATA_BLOCK_TYPE_ORDER = (
     'images', 'materials', 'objects', 'collections', 'node_groups',
     'textures', 'lights', 'armatures', 'worlds', 'particles', 'meshes', 'scenes'
-]
+)
+# Membership checks run once per reference; keep them O(1)
+_DATA_BLOCK_TYPE_NAMES = frozenset(_DATA_BLOCK_TYPE_ORDER)
+
+
+# Objects whose modifier/texture references get traced when debug prints are on
+_DEBUG_ITEM_NAMES = frozenset({'Turf.001', 'Turf'})
+
+# Node socket type enum values that carry a material data-block in default_value
+_MATERIAL_SOCKET_TYPES = frozenset({'MATERIAL'})
+
+
+def _make_reference(prop, ref_type, name):
+    """
+    Build a (property, type, name, mapped_type) reference with interned
+    strings. mapped_type is the data_type key the type maps to (None if
+    untracked), resolved once here so consumers don't redo it. Names are
+    interned too: the same few data-blocks are referenced over and over, and
+    the graph keys its nodes by the same interned names.
+    """
+    try:
+        mapped_type = _REF_TYPE_CACHE[ref_type]
+    except KeyError:
+        # Untracked types cache None; a plain .get() would rerun the ladder for them
+        mapped_type = _normalize_and_map(ref_type)
+    return (sys.intern(prop), sys.intern(ref_type), sys.intern(name), mapped_type)
+
+
+# Normalized reference type -> data_type key
+_TYPE_MAPPING = {
+    'image': 'images',
+    'material': 'materials',
+    'object': 'objects',
+    'collection': 'collections',
+    'nodetree': 'node_groups',
+    'texture': 'textures',
+    'light': 'lights',
+    'armature': 'armatures',
+    'world': 'worlds',
+    'particlesettings': 'particles',
+    'mesh': 'meshes',
+    'scene': 'scenes',
+}
+
+# Raw reference type (RNA identifier) -> data_type key, or None if unmapped.
+# Reference types come from a small fixed vocabulary, so this saturates quickly.
+_REF_TYPE_CACHE = {}
+
+
+def _normalize_and_map(ref_type):
+    """
+    Map a reference type (e.g. 'Texture', 'ShaderNodeTree', 'bpy.types.Image')
+    to its data_type key, caching the result in _REF_TYPE_CACHE.
+    
+    Returns:
+        data_type key, or None if the type isn't one we track
+    """
+    lowered = ref_type.lower()
+    
+    # Normalize Blender RNA identifiers to our type names
+    # Handle patterns like 'Texture', 'TextureDatablock', 'bpy.types.Texture', etc.
+    ref_type_normalized = lowered
+    if 'texture' in lowered and 'datablock' not in lowered:
+        ref_type_normalized = 'texture'
+    elif 'material' in lowered and 'datablock' not in lowered:
+        ref_type_normalized = 'material'
+    elif 'image' in lowered and 'datablock' not in lowered:
+        ref_type_normalized = 'image'
+    elif 'object' in lowered and 'datablock' not in lowered:
+        ref_type_normalized = 'object'
+    elif 'collection' in lowered and 'datablock' not in lowered:
+        ref_type_normalized = 'collection'
+    elif 'nodetree' in lowered or 'nodegroup' in lowered or 'node_tree' in lowered:
+        ref_type_normalized = 'nodetree'
+    elif 'light' in lowered and 'datablock' not in lowered:
+        ref_type_normalized = 'light'
+    elif 'armature' in lowered and 'datablock' not in lowered:
+        ref_type_normalized = 'armature'
+    elif 'world' in lowered and 'datablock' not in lowered:
+        ref_type_normalized = 'world'
+    elif 'particlesettings' in lowered or ('particle' in lowered and 'settings' in lowered):
+        ref_type_normalized = 'particlesettings'
+    elif 'mesh' in lowered and 'datablock' not in lowered:
+        ref_type_normalized = 'mesh'
+    elif 'scene' in lowered and 'datablock' not in lowered:
+        ref_type_normalized = 'scene'
+    
+    mapped_type = _TYPE_MAPPING.get(ref_type_normalized, ref_type_normalized)
+    if mapped_type not in _DATA_BLOCK_TYPE_NAMES:
+        mapped_type = None
+    _REF_TYPE_CACHE[ref_type] = mapped_type
+    return mapped_type
 
 
 def _get_data_block_types():
@@ -46,25 +146,31 @@ def _get_data_block_types():
     This must be called each time to avoid stale references after opening a new blend file.
     """
     try:
-        return {
-            'images': bpy.data.images,
-            'materials': bpy.data.materials,
-            'objects': bpy.data.objects,
-            'collections': bpy.data.collections,
-            'node_groups': bpy.data.node_groups,
-            'textures': bpy.data.textures,
-            'lights': bpy.data.lights,
-            'armatures': bpy.data.armatures,
-            'worlds': bpy.data.worlds,
-            'particles': bpy.data.particles,
-            'meshes': bpy.data.meshes,
-            'scenes': bpy.data.scenes,
-        }
+        data = bpy.data
+        return {data_type: getattr(data, data_type) for data_type in _DATA_BLOCK_TYPE_ORDER}
     except Exception:
         # If accessing bpy.data fails, return empty dict
         return {}
 
 
+def _safe_iter(collection):
+    """
+    Iterate a Blender collection in place, without copying it first.
+    
+    Like _safe_snapshot(), an invalid collection yields nothing; one that
+    becomes invalid mid-iteration just ends early. Only for read-only walks
+    that don't change the collection while iterating.
+    """
+    if collection is None:
+        return
+    try:
+        for item in collection:
+            yield item
+    except Exception:
+        # Same reasoning as _safe_snapshot(): RNA can raise anything here
+        return
+
+
 def _safe_snapshot(collection):
     """
     Create a safe snapshot of a Blender collection/iterable.
@@ -90,249 +196,404 @@ def _safe_snapshot(collection):
         return []
 
 
-def _is_id_datablock_property(prop):
-    """Check if a property is a pointer to an ID data-block."""
-    if prop.type != 'POINTER':
-        return False
+# RNA identifiers of the ID types we track (Image, Material, ...), plus the
+# generic ID that pointers like Object.data and driver targets are typed as.
+# Filled lazily: bpy.data is not accessible while the add-on registers.
+_ID_RNA_IDENTIFIERS = frozenset()
+
+
+def _get_id_rna_identifiers():
+    """
+    RNA identifiers of the tracked ID types, computed once.
     
-    # Check if it points to an ID data-block type
-    if hasattr(prop, 'fixed_type') and prop.fixed_type:
-        rna_type = prop.fixed_type
-        # ID data-blocks have bl_rna and are in bpy.data
-        if hasattr(rna_type, 'bl_rna'):
-            rna_identifier = rna_type.bl_rna.identifier
-            # Check if this is a known ID data-block type
+    Read from the item type of each bpy.data collection property, not from the
+    collection itself: bpy.data.objects is a BlendDataObjects wrapper, while
+    pointers to its items are typed as Object.
+    """
+    global _ID_RNA_IDENTIFIERS
+    if not _ID_RNA_IDENTIFIERS:
+        try:
+            blend_data_properties = bpy.data.bl_rna.properties
+        except Exception:
+            return _ID_RNA_IDENTIFIERS
+        identifiers = {'ID'}
+        for data_type in _DATA_BLOCK_TYPE_ORDER:
             try:
-                data_block_types = _get_data_block_types()
-                for data_type, data_collection in data_block_types.items():
-                    try:
-                        if hasattr(data_collection, 'bl_rna'):
-                            if data_collection.bl_rna.identifier == rna_identifier:
-                                return True
-                    except Exception:
-                        continue
+                identifiers.add(blend_data_properties[data_type].fixed_type.identifier)
             except Exception:
-                pass
+                continue
+        _ID_RNA_IDENTIFIERS = frozenset(identifiers)
+    return _ID_RNA_IDENTIFIERS
+
+
+def _fixed_type_identifier(fixed_type):
+    """RNA identifier of a pointer/collection property's fixed type, or None."""
+    if not fixed_type:
+        return None
+    rna = getattr(fixed_type, 'bl_rna', None)
+    if rna is None:
+        return None
+    return rna.identifier
+
+
+# Per RNA struct identifier: the properties worth visiting, as three tuples of
+# identifiers (ID pointers, ID collections, nested non-ID pointers). Every instance
+# of a struct type shares the same property layout, so the introspection and
+# predicate calls happen once per type, not per instance, and the walk never
+# dispatches on property kind.
+_RNA_PROP_CACHE = {}
+
+# Shared plan of struct types with nothing worth visiting
+_EMPTY_PLAN = ((), (), ())
+
+
+# Nested (non-ID) structs are walked at most this many levels below the data-block
+_MAX_NESTED_DEPTH = 4
+
+
+def _is_id_struct(rna_struct):
+    """Whether an RNA struct definition is ID or derives from it (e.g. NodeTree)."""
+    try:
+        while rna_struct is not None:
+            if rna_struct.identifier == 'ID':
+                return True
+            rna_struct = getattr(rna_struct, 'base', None)
+    except (AttributeError, RuntimeError):
+        pass
     return False
 
 
-def _is_id_datablock_collection(prop):
-    """Check if a property is a collection containing ID data-blocks."""
-    if prop.type != 'COLLECTION':
-        return False
+# Properties pointing back at the owning struct or its RNA definition; never
+# references, and following them would only re-walk what is already visited
+_BACKPOINTER_PROPERTIES = frozenset({'bl_rna', 'rna_type', 'id_data'})
+
+# RNA struct identifier -> whether its walk plan can lead to an ID reference.
+# True while the struct's plan is being built, so a cycle of nested struct
+# types never prunes a path it hasn't finished looking at.
+_STRUCT_REACHES_IDS = {}
+
+
+def _struct_reaches_ids(rna_struct):
+    """Whether walking a struct of this RNA type can yield any ID reference."""
+    reaches = _STRUCT_REACHES_IDS.get(rna_struct.identifier)
+    if reaches is None:
+        _get_rna_property_plan(rna_struct)
+        reaches = _STRUCT_REACHES_IDS[rna_struct.identifier]
+    return reaches
+
+
+def _get_rna_property_plan(rna):
+    """
+    Return the cached (id_pointers, id_collections, nested_pointers) walk plan
+    for an RNA struct; each is a tuple of property identifiers.
+    
+    Nested pointers are only kept when their struct type can itself lead to an
+    ID reference, so settings structs (render, cycles, transforms...) that
+    never hold one aren't walked at all. They are kept even when read-only:
+    RNA marks most nested struct pointers (Object.field, Material.grease_pencil)
+    that way, while the ID pointers inside them are editable.
+    """
+    rna_identifier = rna.identifier
+    plan = _RNA_PROP_CACHE.get(rna_identifier)
+    if plan is not None:
+        return plan
+    id_identifiers = _get_id_rna_identifiers()
+    if not id_identifiers:
+        # bpy.data isn't accessible yet; a plan built now would wrongly prune
+        # this type for the whole session, so don't cache one
+        return _EMPTY_PLAN
+    _STRUCT_REACHES_IDS.setdefault(rna_identifier, True)
     
-    if hasattr(prop, 'fixed_type') and prop.fixed_type:
-        rna_type = prop.fixed_type
-        if hasattr(rna_type, 'bl_rna'):
-            rna_identifier = rna_type.bl_rna.identifier
-            # Check if collection items are ID data-blocks
+    id_pointers = []
+    id_collections = []
+    nested_pointers = []
+    for prop in rna.properties:
+        # Only pointers and collections can reference data-blocks
+        prop_type = prop.type
+        if prop_type != 'POINTER' and prop_type != 'COLLECTION':
+            continue
+        
+        # Skip internal properties and backpointers to the owner
+        identifier = prop.identifier
+        if identifier.startswith('_') or identifier in _BACKPOINTER_PROPERTIES:
+            continue
+        
+        # Each RNA read below is a C-level property fetch; read them once
+        fixed_type = getattr(prop, 'fixed_type', None)
+        if _fixed_type_identifier(fixed_type) in id_identifiers:
+            # Pointer to / collection of a known ID data-block type. Read-only
+            # ones are derived (ID.original, Object.users_collection, ...) and
+            # not references the data-block makes itself.
+            if prop.is_readonly:
+                continue
+            if prop_type == 'POINTER':
+                id_pointers.append(sys.intern(identifier))
+            else:
+                id_collections.append(sys.intern(identifier))
+        elif prop_type == 'POINTER':
+            if (fixed_type is not None and not _is_id_struct(fixed_type)
+                    and _struct_reaches_ids(fixed_type)):
+                nested_pointers.append(sys.intern(identifier))
+    
+    if id_pointers or id_collections or nested_pointers:
+        plan = (tuple(id_pointers), tuple(id_collections), tuple(nested_pointers))
+    else:
+        plan = _EMPTY_PLAN
+    _RNA_PROP_CACHE[rna_identifier] = plan
+    _STRUCT_REACHES_IDS[rna_identifier] = plan is not _EMPTY_PLAN
+    return plan
+
+
+def _struct_key(struct):
+    """
+    Stable identity for an RNA struct.
+
+    bpy creates a fresh Python wrapper on every attribute access, so id() of a
+    wrapper says nothing about the underlying struct; as_pointer() does.
+    """
+    try:
+        return struct.as_pointer()
+    except (AttributeError, TypeError, RuntimeError, ReferenceError):
+        return id(struct)
+
+
+# Per-run memo of compat.is_library_or_override(), keyed by struct pointer.
+# Cleared at the start of every dump and analysis; the same datablocks are
+# checked over and over from the walk, the builders and root gathering.
+_library_state = {}
+
+
+def _is_library_or_override(datablock):
+    """compat.is_library_or_override(), memoized for the current run."""
+    key = _struct_key(datablock)
+    state = _library_state.get(key)
+    if state is None:
+        state = _library_state[key] = compat.is_library_or_override(datablock)
+    return state
+
+
+def invalidate_cache():
+    """
+    Clear the per-run memos (_library_state, _node_tree_memo). Every run resets
+    them itself; this only drops what a run cut short left behind, since they
+    key data-blocks by pointer, which undo and file load reuse.
+    
+    Also drops the per-type walk plans (_RNA_PROP_CACHE, _STRUCT_REACHES_IDS).
+    They don't depend on any file, but add-ons can register new properties on
+    a type, so they are rebuilt after a file load rather than kept all session.
+    
+    Also releases the last analyzed graph held by the type reachability and
+    flattened adjacency caches, so a large file's graph isn't kept alive after
+    the scan.
+    """
+    _library_state.clear()
+    _node_tree_memo.clear()
+    _RNA_PROP_CACHE.clear()
+    _STRUCT_REACHES_IDS.clear()
+    _types_reaching_cache.update(graph=None, parents=None, by_category={})
+    _flat_graph_cache.update(graph=None, flat=None)
+
+
+# Python type -> RNA struct identifier of its instances ('unknown' without bl_rna).
+# bpy wrapper classes map one-to-one onto RNA structs, so this stays tiny.
+_RNA_IDENTIFIER_BY_TYPE = {}
+
+
+def _rna_identifier(value):
+    """RNA struct identifier of a referenced value, cached per Python type."""
+    value_type = type(value)
+    identifier = _RNA_IDENTIFIER_BY_TYPE.get(value_type)
+    if identifier is None:
+        value_rna = getattr(value, 'bl_rna', None)
+        if value_rna is None:
+            identifier = 'unknown'
+        else:
             try:
-                data_block_types = _get_data_block_types()
-                for data_type, data_collection in data_block_types.items():
-                    try:
-                        if hasattr(data_collection, 'bl_rna'):
-                            if data_collection.bl_rna.identifier == rna_identifier:
-                                return True
-                    except Exception:
-                        continue
-            except Exception:
-                pass
-    return False
+                identifier = value_rna.identifier
+            except (AttributeError, RuntimeError):
+                # Invalid struct; don't let it decide for the whole type
+                return 'unknown'
+        _RNA_IDENTIFIER_BY_TYPE[value_type] = identifier
+    return identifier
 
 
-def _extract_references_from_datablock(datablock, depth=0, max_depth=5):
+def _extract_references_from_datablock(datablock, out, visited, depth=0):
     """
     Extract all data-block references from a single data-block instance.
     
+    Nested structs are walked with an explicit stack rather than recursion.
+    
     Args:
-        datablock: The data-block to extract references from
-        depth: Current recursion depth (default: 0)
-        max_depth: Maximum recursion depth to prevent infinite loops (default: 5)
+        datablock: The data-block (or nested struct) to extract references from
+        out: List that references (see _make_reference) are appended to
+        visited: Set of (RNA identifier, struct key) pairs already walked during
+            this extraction; a struct reached again (pointer cycle, shared
+            nested struct) is skipped
+        depth: Nesting level below the top-level data-block; nested structs
+            deeper than _MAX_NESTED_DEPTH are not walked
     """
-    references = []
+    # Local aliases: the loop below runs once per walked property of every datablock
+    append = out.append
+    make_reference = _make_reference
+    rna_identifier = _rna_identifier
+    id_type = bpy.types.ID
     
-    # Prevent infinite recursion
-    if depth >= max_depth:
-        return references
-    
-    # Safety check: ensure datablock is valid
-    if datablock is None:
-        return references
-    
-    try:
-        rna = datablock.bl_rna
-    except (AttributeError, TypeError, RuntimeError):
-        return references
+    # (struct, nesting level)
+    stack = [(datablock, depth)]
+    pop = stack.pop
     
-    try:
-        for prop in rna.properties:
-            # Skip internal/read-only properties
-            if prop.identifier.startswith('_') or prop.is_readonly:
+    while stack:
+        struct, depth = pop()
+        
+        # Safety check: ensure struct is valid
+        if struct is None or depth > _MAX_NESTED_DEPTH:
+            continue
+        
+        try:
+            rna = struct.bl_rna
+            # Keyed by type too: some nested wrappers share their owner's
+            # pointer (Object.light_linking and Object.display wrap the Object)
+            key = (rna.identifier, _struct_key(struct))
+            if key in visited:
                 continue
-            
-            # Check for pointer properties to ID data-blocks
-            if _is_id_datablock_property(prop):
-                try:
-                    value = getattr(datablock, prop.identifier, None)
-                    if value and hasattr(value, 'name'):
-                        # Additional safety: check if value is still valid
+            visited.add(key)
+            plan = _get_rna_property_plan(rna)
+        except (AttributeError, TypeError, RuntimeError):
+            continue
+        if plan is _EMPTY_PLAN:
+            # Nothing on this struct type can reference a data-block
+            continue
+        
+        id_pointers, id_collections, nested_pointers = plan
+        child_depth = depth + 1
+        # Nested structs to walk, in property order
+        children = []
+        push = children.append
+        
+        # Check for pointer properties to ID data-blocks
+        for identifier in id_pointers:
+            try:
+                value = getattr(struct, identifier, None)
+                if value:
+                    # Additional safety: check if value is still valid
+                    try:
+                        name = getattr(value, 'name', None)
+                        if name is not None:
+                            append(make_reference(identifier, rna_identifier(value), name))
+                    except (AttributeError, RuntimeError, ReferenceError):
+                        # Data-block may have been deleted or is invalid
+                        pass
+            except (AttributeError, TypeError, RuntimeError):
+                pass
+        
+        # Check for collection properties containing ID data-blocks
+        for identifier in id_collections:
+            try:
+                collection = getattr(struct, identifier, None)
+                if collection:
+                    # Items are data-blocks, walked on their own by the dump
+                    for item in _safe_iter(collection):
+                        if item is None:
+                            continue
                         try:
-                            name = value.name
-                            type_identifier = 'unknown'
-                            if hasattr(value, 'bl_rna'):
-                                try:
-                                    type_identifier = value.bl_rna.identifier
-                                except (AttributeError, RuntimeError):
-                                    pass
-                            
-                            references.append({
-                                'property': prop.identifier,
-                                'type': type_identifier,
-                                'name': name
-                            })
+                            name = getattr(item, 'name', None)
+                            if name is not None:
+                                append(make_reference(identifier, rna_identifier(item), name))
                         except (AttributeError, RuntimeError, ReferenceError):
-                            # Data-block may have been deleted or is invalid
-                            pass
-                except (AttributeError, TypeError, RuntimeError):
-                    pass
-            
-            # Check for collection properties containing ID data-blocks
-            elif _is_id_datablock_collection(prop):
-                try:
-                    collection = getattr(datablock, prop.identifier, None)
-                    if collection:
-                        # Use snapshot to avoid iteration issues
-                        items = _safe_snapshot(collection)
-                        if not items:
+                            # Item may have been deleted or is invalid
                             continue
-                        
-                        for item in items:
-                            if item is None:
-                                continue
-                            try:
-                                # Extract references from items that have names (e.g., material slots)
-                                if hasattr(item, 'name'):
-                                    name = item.name
-                                    type_identifier = 'unknown'
-                                    if hasattr(item, 'bl_rna'):
-                                        try:
-                                            type_identifier = item.bl_rna.identifier
-                                        except (AttributeError, RuntimeError):
-                                            pass
-                                    
-                                    references.append({
-                                        'property': prop.identifier,
-                                        'type': type_identifier,
-                                        'name': name
-                                    })
-                                
-                                # IMPORTANT: Also recursively extract from collection items (e.g., modifiers)
-                                # even if they don't have names, to capture nested references like modifier.texture
-                                # This ensures we capture references even if explicit handling fails
-                                if depth < max_depth:
-                                    try:
-                                        nested_refs = _extract_references_from_datablock(item, depth + 1, max_depth)
-                                        # Prepend the collection property name to nested property paths
-                                        for nested_ref in nested_refs:
-                                            nested_prop = nested_ref.get('property', '')
-                                            if nested_prop:
-                                                nested_ref['property'] = f"{prop.identifier}.{nested_prop}"
-                                        references.extend(nested_refs)
-                                    except (AttributeError, TypeError, RecursionError, RuntimeError):
-                                        # Recursive extraction may fail for some items
-                                        pass
-                            except (AttributeError, RuntimeError, ReferenceError):
-                                # Item may have been deleted or is invalid
-                                continue
-                except (AttributeError, TypeError, RuntimeError):
-                    pass
-            
-            # Special handling for nested structures (e.g., node trees)
-            # Check if property is a pointer that might contain nested references
-            elif prop.type == 'POINTER' and hasattr(prop, 'fixed_type'):
-                try:
-                    value = getattr(datablock, prop.identifier, None)
-                    if value:
-                        # Recursively extract from nested structures with depth limit
-                        nested_refs = _extract_references_from_datablock(value, depth + 1, max_depth)
-                        references.extend(nested_refs)
-                except (AttributeError, TypeError, RecursionError, RuntimeError):
-                    pass
-    
-    except (AttributeError, TypeError, RuntimeError):
-        pass
-    
-    return references
+            except (AttributeError, TypeError, RuntimeError):
+                pass
+        
+        # Special handling for nested structures (e.g., modifier settings)
+        # Pointers to other IDs are not followed: those data-blocks get their own
+        # top-level walk, and following them would re-walk the whole reachable blend.
+        # The plan already leaves out pointers statically typed as an ID; this
+        # catches generic pointers whose value turns out to be one.
+        for identifier in nested_pointers:
+            try:
+                value = getattr(struct, identifier, None)
+                if value and not isinstance(value, id_type):
+                    push((value, child_depth))
+            except (AttributeError, TypeError, RuntimeError):
+                pass
+        
+        # Reversed, so children are walked in property order like a recursive
+        # walk would: a struct shared by two paths is claimed by the first one
+        stack.extend(reversed(children))
 
 
-def _extract_node_tree_references(node_tree):
-    """Extract references from a node tree (materials, compositor, etc.)."""
-    references = []
+# Per-walk memo of each node tree's own references and group trees, by struct
+# key. A node group used by many materials (or nested in many other groups) is
+# walked once per dump; _walk_datablocks() resets it.
+_node_tree_memo = {}
+
+
+def _node_tree_own_references(node_tree, key):
+    """
+    References from one node tree's own nodes, without descending into groups.
     
-    if not node_tree:
-        return references
+    Returns:
+        (references, groups): tuple of references, and tuple of the node trees
+        used by the tree's group nodes
+    """
+    memoized = _node_tree_memo.get(key)
+    if memoized is not None:
+        return memoized
+    
+    references = []
+    groups = []
+    # Shared by the tree's nodes, so structs reachable from several nodes are walked once
+    visited = set()
     
     try:
-        # Create a snapshot of nodes to avoid iteration issues
-        nodes = _safe_snapshot(node_tree.nodes)
-        if not nodes:
-            return references
-        
-        for node in nodes:
+        append = references.append
+        make_reference = _make_reference
+        for node in _safe_iter(node_tree.nodes):
             if node is None:
                 continue
             try:
                 # Check node properties for data-block references
-                node_refs = _extract_references_from_datablock(node)
-                references.extend(node_refs)
+                _extract_references_from_datablock(node, references, visited)
                 
                 # Special handling for group nodes
-                if hasattr(node, 'node_tree') and node.node_tree:
+                ng = getattr(node, 'node_tree', None)
+                if ng:
                     try:
-                        ng = node.node_tree
-                        if ng and hasattr(ng, 'name'):
-                            references.append({
-                                'property': 'node_tree',
-                                'type': 'NodeTree',
-                                'name': ng.name
-                            })
-                        # Recursively check nested node tree
-                        nested_refs = _extract_node_tree_references(node.node_tree)
-                        references.extend(nested_refs)
+                        ng_name = getattr(ng, 'name', None)
+                        if ng_name is not None:
+                            append(make_reference('node_tree', 'NodeTree', ng_name))
+                        # The nested node tree is walked by the caller
+                        groups.append(ng)
                     except (AttributeError, RuntimeError, ReferenceError):
                         pass
                 
                 # Special handling for nodes with image property (Image Texture nodes, etc.)
-                if hasattr(node, 'image') and node.image:
+                img = getattr(node, 'image', None)
+                if img:
                     try:
-                        img = node.image
-                        if img and hasattr(img, 'name') and not compat.is_library_or_override(img):
-                            references.append({
-                                'property': 'image',
-                                'type': 'Image',
-                                'name': img.name
-                            })
+                        img_name = getattr(img, 'name', None)
+                        if img_name is not None and not _is_library_or_override(img):
+                            append(make_reference('image', 'Image', img_name))
                     except (AttributeError, RuntimeError, ReferenceError):
                         pass
                 
                 # Special handling for nodes with material input sockets (Menu Switch, Set Material, etc.)
-                if hasattr(node, 'inputs'):
+                inputs = getattr(node, 'inputs', None)
+                if inputs is not None:
                     try:
-                        for input_socket in node.inputs:
+                        for input_socket in inputs:
                             try:
-                                # Check socket type - material sockets are typically 'MATERIAL' type
-                                socket_type = getattr(input_socket, 'type', '')
-                                if socket_type == 'MATERIAL' or 'material' in str(socket_type).lower():
-                                    # Check if this socket has a default_value that is a material
-                                    if hasattr(input_socket, 'default_value') and input_socket.default_value:
-                                        socket_material = input_socket.default_value
-                                        # Check if it's a material datablock
-                                        if socket_material and hasattr(socket_material, 'name') and not compat.is_library_or_override(socket_material):
-                                            references.append({
-                                                'property': 'inputs.material',
-                                                'type': 'Material',
-                                                'name': socket_material.name
-                                            })
+                                # Socket type is an exact enum string; skip everything but material sockets
+                                if getattr(input_socket, 'type', None) not in _MATERIAL_SOCKET_TYPES:
+                                    continue
+                                # Check if this socket has a default_value that is a material
+                                socket_material = getattr(input_socket, 'default_value', None)
+                                if socket_material:
+                                    # Check if it's a material datablock
+                                    material_name = getattr(socket_material, 'name', None)
+                                    if material_name is not None and not _is_library_or_override(socket_material):
+                                        append(make_reference('inputs.material', 'Material', material_name))
                             except (AttributeError, ReferenceError, RuntimeError, TypeError, KeyError):
                                 continue  # Skip this socket if we can't access it
                     except (AttributeError, RuntimeError, ReferenceError):
@@ -343,427 +604,557 @@ def _extract_node_tree_references(node_tree):
     except (AttributeError, TypeError):
         pass
     
-    return references
+    memoized = _node_tree_memo[key] = (tuple(references), tuple(groups))
+    return memoized
 
 
-def dump_rna_references(output_path=None):
+def _extract_node_tree_references(node_tree):
     """
-    Dump all data-block references found via RNA introspection to JSON.
-    
-    Args:
-        output_path: Optional path to save JSON file. If None, returns dict.
+    Extract references from a node tree (materials, compositor, etc.),
+    including the trees of its group nodes at any nesting depth.
     
-    Returns:
-        Dictionary with structure: {data_type: {item_name: {references: [...], referenced_by: []}}}
+    Group trees are walked with an explicit stack; each tree is visited once
+    per call, so shared sub-groups and group cycles cost nothing extra.
     """
-    config.debug_print("[Atomic Debug] RNA Analysis: Starting reference dump...")
-    
-    rna_data = {}
-    reference_map = {}  # Track reverse references: {target_type: {target_name: [source_info]}}
+    references = []
     
-    # Get fresh references to data-block types (critical after opening a new blend file)
-    try:
-        data_block_types = _get_data_block_types()
-    except Exception:
-        config.debug_print("[Atomic Debug] RNA Analysis: Failed to get data-block types, returning empty data")
-        if output_path:
-            with open(output_path, 'w') as f:
-                json.dump({}, f, indent=2)
-        return {}
+    if not node_tree:
+        return references
     
-    # Initialize structure
-    for data_type in data_block_types.keys():
-        rna_data[data_type] = {}
+    seen = set()
+    stack = [node_tree]
+    while stack:
+        tree = stack.pop()
+        key = _struct_key(tree)
+        if key in seen:
+            continue
+        seen.add(key)
+        
+        own_references, groups = _node_tree_own_references(tree, key)
+        references.extend(own_references)
+        # Reversed, so groups are walked in node order
+        stack.extend(reversed(groups))
     
-    # Extract references from all data-blocks
-    # Wrap in try-except to handle crashes when collections become invalid
-    for data_type, data_collection in data_block_types.items():
+    return references
+
+
+def _read_material_fields(material):
+    """Read the fields the dump needs from a material in one go."""
+    return getattr(material, 'node_tree', None)
+
+
+def _read_node_group_fields(node_group):
+    """Node groups are their own node tree."""
+    return node_group
+
+
+def _read_world_fields(world):
+    """Read the fields the dump needs from a world in one go."""
+    return getattr(world, 'node_tree', None)
+
+
+def _read_scene_fields(scene):
+    """
+    Read the fields the dump needs from a scene in one go.
+
+    Returns:
+        (compositor node tree, root collection, world, rigid body world collection)
+    """
+    rigidbody_world = getattr(scene, 'rigidbody_world', None)
+    return (
+        compat.get_scene_compositor_node_tree(scene),
+        getattr(scene, 'collection', None),
+        getattr(scene, 'world', None),
+        getattr(rigidbody_world, 'collection', None) if rigidbody_world else None,
+    )
+
+
+def _read_collection_fields(collection):
+    """Read the fields the dump needs from a collection in one go."""
+    return _safe_snapshot(getattr(collection, 'objects', None))
+
+
+def _read_object_fields(obj):
+    """
+    Read the fields the dump needs from an object in one go.
+
+    Returns:
+        (modifiers, material slots, particle systems) snapshots
+    """
+    # Most objects have none of these; an empty RNA collection is falsy, so
+    # skip the snapshot for those
+    modifiers = getattr(obj, 'modifiers', None)
+    material_slots = getattr(obj, 'material_slots', None)
+    particle_systems = getattr(obj, 'particle_systems', None)
+    return (
+        _safe_snapshot(modifiers) if modifiers else [],
+        _safe_snapshot(material_slots) if material_slots else [],
+        _safe_snapshot(particle_systems) if particle_systems else [],
+    )
+
+
+def _read_particle_fields(particle_settings):
+    """Read the fields the dump needs from particle settings in one go."""
+    return _safe_snapshot(getattr(particle_settings, 'texture_slots', None))
+
+
+def _read_texture_fields(texture):
+    """Read the fields the dump needs from a texture in one go."""
+    return getattr(texture, 'image', None)
+
+
+def _build_node_tree_owner_references(item_name, node_tree, references):
+    """Materials, node groups and worlds: references from their node tree."""
+    if node_tree:
+        references.extend(_extract_node_tree_references(node_tree))
+
+
+def _id_reference_name(id_block):
+    """
+    Name of a local (non-linked, non-override) datablock, or None if it is
+    unset, linked/override or no longer valid.
+    """
+    if not id_block:
+        return None
+    try:
+        if _is_library_or_override(id_block):
+            return None
+        return id_block.name
+    except (AttributeError, RuntimeError, ReferenceError):
+        return None
+
+
+def _read_slot_values(slots, attribute):
+    """
+    Read attribute (material, texture, settings, ...) from every slot,
+    skipping empty or invalid slots and unset values.
+    """
+    values = []
+    for slot in slots:
+        if slot is None:
+            continue
         try:
-            config.debug_print(f"[Atomic Debug] RNA Analysis: Processing {data_type}...")
-            
-            # Create a snapshot of the data collection to avoid iteration issues
-            # This is critical when a new blend file is opened - old data-blocks become invalid
-            datablocks = _safe_snapshot(data_collection)
-            
-            for datablock in datablocks:
-                # Skip library-linked/override datablocks *except* for certain "reference-only"
-                # roots (not cleanable themselves) that can still reference local data that
-                # should not be flagged as unused (e.g. local materials assigned to linked objects).
-                is_linked_or_override = False
-                try:
-                    is_linked_or_override = compat.is_library_or_override(datablock)
-                except (AttributeError, RuntimeError, ReferenceError):
-                    # Datablock may be invalid
-                    continue
-                if is_linked_or_override and data_type not in {'objects'}:
-                    continue
-                
-                try:
-                    item_name = datablock.name
-                except (AttributeError, RuntimeError, ReferenceError):
-                    # Datablock may have been deleted or is invalid
-                    continue
-                
-                references = []
-                
-                # Extract direct references
-                try:
-                    direct_refs = _extract_references_from_datablock(datablock)
-                    references.extend(direct_refs)
-                except (AttributeError, RuntimeError, ReferenceError):
-                    # Datablock may have become invalid during processing
-                    direct_refs = []
-                
-                # Special handling for materials (node trees)
-                try:
-                    if data_type == 'materials' and hasattr(datablock, 'node_tree') and datablock.node_tree:
-                        node_refs = _extract_node_tree_references(datablock.node_tree)
-                        references.extend(node_refs)
-                except (AttributeError, RuntimeError, ReferenceError):
-                    pass
-                
-                # Special handling for node groups
-                try:
-                    if data_type == 'node_groups':
-                        node_refs = _extract_node_tree_references(datablock)
-                        references.extend(node_refs)
-                except (AttributeError, RuntimeError, ReferenceError):
-                    pass
-                
-                # Special handling for scenes (compositor, rigidbody_world, collection, world, etc.)
-                try:
-                    if data_type == 'scenes':
-                        # Compositor node tree reference
-                        node_tree = compat.get_scene_compositor_node_tree(datablock)
-                        if node_tree:
-                            try:
-                                if not compat.is_library_or_override(node_tree):
-                                    references.append({
-                                        'property': 'node_tree',
-                                        'type': 'NodeTree',
-                                        'name': node_tree.name
-                                    })
-                                    # Also extract references from within the node tree
-                                    node_refs = _extract_node_tree_references(node_tree)
-                                    references.extend(node_refs)
-                            except (AttributeError, RuntimeError, ReferenceError):
-                                pass
-                        
-                        # Scene's root collection
-                        if hasattr(datablock, 'collection') and datablock.collection:
-                            try:
-                                if not compat.is_library_or_override(datablock.collection):
-                                    references.append({
-                                        'property': 'collection',
-                                        'type': 'Collection',
-                                        'name': datablock.collection.name
-                                    })
-                            except (AttributeError, RuntimeError, ReferenceError):
-                                pass
-                        
-                        # Scene's world reference
-                        if hasattr(datablock, 'world') and datablock.world:
-                            try:
-                                if not compat.is_library_or_override(datablock.world):
-                                    references.append({
-                                        'property': 'world',
-                                        'type': 'World',
-                                        'name': datablock.world.name
-                                    })
-                            except (AttributeError, RuntimeError, ReferenceError):
-                                pass
-                        
-                        # RigidBodyWorld collection reference
-                        if hasattr(datablock, 'rigidbody_world') and datablock.rigidbody_world:
-                            try:
-                                if hasattr(datablock.rigidbody_world, 'collection') and datablock.rigidbody_world.collection:
-                                    if not compat.is_library_or_override(datablock.rigidbody_world.collection):
-                                        references.append({
-                                            'property': 'rigidbody_world.collection',
-                                            'type': 'Collection',
-                                            'name': datablock.rigidbody_world.collection.name
-                                        })
-                            except (AttributeError, RuntimeError, ReferenceError):
-                                pass
-                except (AttributeError, RuntimeError, ReferenceError):
-                    pass
-                
-                # Special handling for collections (objects property)
-                try:
-                    if data_type == 'collections':
-                        # Collections have an 'objects' property that contains objects
-                        # This is a collection property, so it should be detected by _is_id_datablock_collection
-                        # But let's also explicitly check to ensure it's captured
-                        if hasattr(datablock, 'objects'):
-                            # Create a snapshot to avoid iteration issues
-                            objects = _safe_snapshot(datablock.objects)
-                            
-                            for obj in objects:
-                                if obj is None:
-                                    continue
-                                try:
-                                    # Even if the object is linked/override, keep the reference:
-                                    # linked scene content can still reference local datablocks.
-                                    references.append({
-                                        'property': 'objects',
-                                        'type': 'Object',
-                                        'name': obj.name
-                                    })
-                                except (AttributeError, RuntimeError, ReferenceError):
-                                    continue
-                except (AttributeError, RuntimeError, ReferenceError):
-                    pass
-                
-                # Special handling for objects (modifiers with node groups, material slots)
-                try:
-                    if data_type == 'objects':
-                        # Objects can have modifiers that reference node groups (e.g., Geometry Nodes modifiers)
-                        if hasattr(datablock, 'modifiers'):
-                            # Create a snapshot to avoid iteration issues
-                            modifiers = _safe_snapshot(datablock.modifiers)
-                            
-                            # Debug: Log modifier count for Turf objects
-                            if item_name in ('Turf.001', 'Turf'):
-                                mod_names = [m.name if m else 'None' for m in modifiers]
-                                config.debug_print(f"[Atomic Debug] RNA Analysis: {item_name} modifiers count={len(modifiers)}, names={mod_names}")
-                            
-                            for modifier in modifiers:
-                                if modifier is None:
-                                    continue
-                                try:
-                                    if compat.is_geometry_nodes_modifier(modifier):
-                                        ng = compat.get_geometry_nodes_modifier_node_group(modifier)
-                                        if ng and not compat.is_library_or_override(ng):
-                                            references.append({
-                                                'property': 'modifiers.node_group',
-                                                'type': 'NodeTree',
-                                                'name': ng.name
-                                            })
-                                except (AttributeError, RuntimeError, ReferenceError):
-                                    # Geometry nodes modifier access may fail
-                                    pass
-                                
-                                # Modifiers with .texture (e.g. Displace) reference Texture datablocks
-                                # IMPORTANT: capture references to linked textures too, so we can traverse
-                                # the graph correctly (even though linked textures themselves aren't cleanable)
-                                # Use separate try-except to ensure texture references are captured even if
-                                # geometry nodes modifier access failed above
-                                try:
-                                    has_texture_attr = hasattr(modifier, 'texture')
-                                    texture_value = modifier.texture if has_texture_attr else None
-                                    
-                                    # Debug: Log modifier texture access for Turf objects
-                                    if item_name in ('Turf.001', 'Turf'):
-                                        config.debug_print(f"[Atomic Debug] RNA Analysis: {item_name} modifier '{modifier.name}' has_texture={has_texture_attr}, texture={texture_value}")
-                                    
-                                    if has_texture_attr and texture_value:
-                                        # Access texture.name in try-except in case texture is linked/inaccessible
-                                        try:
-                                            texture_name = modifier.texture.name
-                                            # Get type identifier from texture's bl_rna to ensure correct mapping
-                                            texture_type = 'Texture'
-                                            if hasattr(modifier.texture, 'bl_rna'):
-                                                try:
-                                                    rna_id = modifier.texture.bl_rna.identifier
-                                                    # Map common Blender RNA identifiers to our type names
-                                                    if 'Texture' in rna_id:
-                                                        texture_type = 'Texture'
-                                                except (AttributeError, RuntimeError):
-                                                    pass
-                                            
-                                            # Check if this reference already exists (from recursive extraction)
-                                            # to avoid duplicates, but ensure we capture it explicitly
-                                            ref_exists = any(
-                                                ref.get('property') == 'modifiers.texture' and
-                                                ref.get('name') == texture_name and
-                                                ref.get('type', '').lower() in ('texture', 'texturedatablock', 'bpy.types.texture')
-                                                for ref in references
-                                            )
-                                            
-                                            # Debug: Log texture reference capture for Turf objects
-                                            if item_name in ('Turf.001', 'Turf'):
-                                                config.debug_print(f"[Atomic Debug] RNA Analysis: {item_name} modifier '{modifier.name}' texture_name={texture_name}, ref_exists={ref_exists}")
-                                            
-                                            if not ref_exists:
-                                                references.append({
-                                                    'property': 'modifiers.texture',
-                                                    'type': texture_type,
-                                                    'name': texture_name
-                                                })
-                                                # Debug: Confirm reference was added
-                                                if item_name in ('Turf.001', 'Turf'):
-                                                    config.debug_print(f"[Atomic Debug] RNA Analysis: {item_name} ADDED modifiers.texture -> {texture_name}")
-                                        except (AttributeError, RuntimeError, ReferenceError) as e:
-                                            # Texture.name access failed - texture may be linked/inaccessible
-                                            if item_name in ('Turf.001', 'Turf'):
-                                                config.debug_print(f"[Atomic Debug] RNA Analysis: {item_name} texture.name access failed: {e}")
-                                            pass
-                                except (AttributeError, RuntimeError, ReferenceError) as e:
-                                    # Modifier.texture may be inaccessible (e.g., linked modifier/texture)
-                                    if item_name in ('Turf.001', 'Turf'):
-                                        config.debug_print(f"[Atomic Debug] RNA Analysis: {item_name} modifier texture access failed: {e}")
-                                    pass
-                        
-                        # Objects have material slots that reference materials
-                        if hasattr(datablock, 'material_slots'):
-                            # Create a snapshot to avoid iteration issues
-                            material_slots = _safe_snapshot(datablock.material_slots)
-                            
-                            for slot in material_slots:
-                                if slot is None:
-                                    continue
-                                try:
-                                    if hasattr(slot, 'material') and slot.material:
-                                        if not compat.is_library_or_override(slot.material):
-                                            references.append({
-                                                'property': 'material_slots.material',
-                                                'type': 'Material',
-                                                'name': slot.material.name
-                                            })
-                                except (AttributeError, RuntimeError, ReferenceError):
-                                    # Slot or material may be invalid
-                                    continue
-                        
-                        # Objects have particle_systems that reference particle settings
-                        # IMPORTANT: capture references to linked particle settings too, so we can traverse
-                        # the graph correctly (even though linked particle settings themselves aren't cleanable)
-                        if hasattr(datablock, 'particle_systems'):
-                            for ps in _safe_snapshot(datablock.particle_systems):
-                                if ps is None:
-                                    continue
-                                try:
-                                    if hasattr(ps, 'settings') and ps.settings:
-                                        references.append({
-                                            'property': 'particle_systems.settings',
-                                            'type': 'ParticleSettings',
-                                            'name': ps.settings.name
-                                        })
-                                except (AttributeError, RuntimeError, ReferenceError):
-                                    continue
-                except (AttributeError, RuntimeError, ReferenceError):
-                    pass
-                
-                # Special handling for worlds (node tree → images/textures)
-                try:
-                    if data_type == 'worlds' and hasattr(datablock, 'node_tree') and datablock.node_tree:
-                        node_refs = _extract_node_tree_references(datablock.node_tree)
-                        references.extend(node_refs)
-                except (AttributeError, RuntimeError, ReferenceError):
-                    pass
-                
-                # Special handling for particles (texture_slots → Texture; used by objects in scene)
+            value = getattr(slot, attribute, None)
+        except (RuntimeError, ReferenceError):
+            # Slot may be invalid
+            continue
+        if value:
+            values.append(value)
+    return values
+
+
+def _build_scene_references(item_name, fields, references):
+    """Scenes: compositor, root collection, world and rigid body world collection."""
+    node_tree, collection, world, rigidbody_collection = fields
+
+    # Compositor node tree reference
+    name = _id_reference_name(node_tree)
+    if name is not None:
+        references.append(_make_reference('node_tree', 'NodeTree', name))
+        # Also extract references from within the node tree
+        references.extend(_extract_node_tree_references(node_tree))
+
+    # Scene's root collection
+    name = _id_reference_name(collection)
+    if name is not None:
+        references.append(_make_reference('collection', 'Collection', name))
+
+    # Scene's world reference
+    name = _id_reference_name(world)
+    if name is not None:
+        references.append(_make_reference('world', 'World', name))
+
+    # RigidBodyWorld collection reference
+    name = _id_reference_name(rigidbody_collection)
+    if name is not None:
+        references.append(_make_reference('rigidbody_world.collection', 'Collection', name))
+
+
+def _build_collection_references(item_name, objects, references):
+    """Collections: the objects they contain."""
+    # Collections have an 'objects' property that contains objects
+    # This is a collection property, so the generic walk should pick it up as an ID collection
+    # But let's also explicitly check to ensure it's captured
+    append = references.append
+    make_reference = _make_reference
+    for obj in objects:
+        if obj is None:
+            continue
+        try:
+            name = obj.name
+        except (AttributeError, RuntimeError, ReferenceError):
+            continue
+        # Even if the object is linked/override, keep the reference:
+        # linked scene content can still reference local datablocks.
+        append(make_reference('objects', 'Object', name))
+
+
+# Geometry-nodes probe result per modifier RNA class (NodesModifier, DisplaceModifier, ...)
+_GN_MODIFIER_CLASSES = {}
+
+
+def _is_geometry_nodes_modifier(modifier):
+    """compat.is_geometry_nodes_modifier(), cached by the modifier's class."""
+    class_name = type(modifier).__name__
+    is_gn = _GN_MODIFIER_CLASSES.get(class_name)
+    if is_gn is None:
+        is_gn = _GN_MODIFIER_CLASSES[class_name] = compat.is_geometry_nodes_modifier(modifier)
+    return is_gn
+
+
+def _build_object_references(item_name, fields, references):
+    """Objects: modifiers with node groups/textures, material slots, particle systems."""
+    modifiers, material_slots, particle_systems = fields
+
+    # Debug: Log modifier count for Turf objects. Decided once per object so
+    # release runs never build the debug f-strings below.
+    debug_item = config.enable_debug_prints and item_name in _DEBUG_ITEM_NAMES
+    if debug_item:
+        mod_names = [m.name if m else 'None' for m in modifiers]
+        config.debug_print(f"[Atomic Debug] RNA Analysis: {item_name} modifiers count={len(modifiers)}, names={mod_names}")
+
+    # Objects can have modifiers that reference node groups (e.g., Geometry Nodes modifiers)
+    for modifier in modifiers:
+        if modifier is None:
+            continue
+        try:
+            if _is_geometry_nodes_modifier(modifier):
+                ng = modifier.node_group
+                if ng and not _is_library_or_override(ng):
+                    references.append(_make_reference('modifiers.node_group', 'NodeTree', ng.name))
+        except (AttributeError, RuntimeError, ReferenceError):
+            # Geometry nodes modifier access may fail
+            pass
+
+        # Modifiers with .texture (e.g. Displace) reference Texture datablocks
+        # IMPORTANT: capture references to linked textures too, so we can traverse
+        # the graph correctly (even though linked textures themselves aren't cleanable)
+        # Use separate try-except to ensure texture references are captured even if
+        # geometry nodes modifier access failed above
+        try:
+            texture_value = getattr(modifier, 'texture', None)
+
+            # Debug: Log modifier texture access for Turf objects
+            if debug_item:
+                config.debug_print(f"[Atomic Debug] RNA Analysis: {item_name} modifier '{modifier.name}' texture={texture_value}")
+
+            if texture_value:
+                # Access texture.name in try-except in case texture is linked/inaccessible
                 try:
-                    if data_type == 'particles' and hasattr(datablock, 'texture_slots'):
-                        for slot in _safe_snapshot(datablock.texture_slots):
-                            if slot is None:
-                                continue
-                            try:
-                                if hasattr(slot, 'texture') and slot.texture and not compat.is_library_or_override(slot.texture):
-                                    references.append({
-                                        'property': 'texture_slots.texture',
-                                        'type': 'Texture',
-                                        'name': slot.texture.name
-                                    })
-                            except (AttributeError, RuntimeError, ReferenceError):
-                                continue
-                except (AttributeError, RuntimeError, ReferenceError):
+                    texture_name = texture_value.name
+                    texture_type = 'Texture'
+
+                    # Check if this reference already exists (from recursive extraction)
+                    # to avoid duplicates, but ensure we capture it explicitly
+                    ref_exists = any(
+                        ref_prop == 'modifiers.texture' and
+                        ref_name == texture_name and
+                        mapped_type == 'textures'
+                        for ref_prop, _ref_type, ref_name, mapped_type in references
+                    )
+
+                    # Debug: Log texture reference capture for Turf objects
+                    if debug_item:
+                        config.debug_print(f"[Atomic Debug] RNA Analysis: {item_name} modifier '{modifier.name}' texture_name={texture_name}, ref_exists={ref_exists}")
+
+                    if not ref_exists:
+                        references.append(_make_reference('modifiers.texture', texture_type, texture_name))
+                        # Debug: Confirm reference was added
+                        if debug_item:
+                            config.debug_print(f"[Atomic Debug] RNA Analysis: {item_name} ADDED modifiers.texture -> {texture_name}")
+                except (AttributeError, RuntimeError, ReferenceError) as e:
+                    # Texture.name access failed - texture may be linked/inaccessible
+                    if debug_item:
+                        config.debug_print(f"[Atomic Debug] RNA Analysis: {item_name} texture.name access failed: {e}")
                     pass
-                
-                # Special handling for textures (legacy .image → Image; e.g. rippleblur.png via Texture used by Turf)
+        except (AttributeError, RuntimeError, ReferenceError) as e:
+            # Modifier.texture may be inaccessible (e.g., linked modifier/texture)
+            if debug_item:
+                config.debug_print(f"[Atomic Debug] RNA Analysis: {item_name} modifier texture access failed: {e}")
+            pass
+
+    # Objects have material slots that reference materials
+    references.extend(
+        _make_reference('material_slots.material', 'Material', name)
+        for name in map(_id_reference_name, _read_slot_values(material_slots, 'material'))
+        if name is not None
+    )
+
+    # Objects have particle_systems that reference particle settings
+    # IMPORTANT: capture references to linked particle settings too, so we can traverse
+    # the graph correctly (even though linked particle settings themselves aren't cleanable)
+    for settings in _read_slot_values(particle_systems, 'settings'):
+        try:
+            name = settings.name
+        except (AttributeError, RuntimeError, ReferenceError):
+            continue
+        references.append(_make_reference('particle_systems.settings', 'ParticleSettings', name))
+
+
+def _build_particle_references(item_name, texture_slots, references):
+    """Particles: texture_slots → Texture (used by objects in scene)."""
+    references.extend(
+        _make_reference('texture_slots.texture', 'Texture', name)
+        for name in map(_id_reference_name, _read_slot_values(texture_slots, 'texture'))
+        if name is not None
+    )
+
+
+def _build_texture_references(item_name, image, references):
+    """Textures: legacy .image → Image (e.g. rippleblur.png via Texture used by Turf)."""
+    name = _id_reference_name(image)
+    if name is not None:
+        references.append(_make_reference('image', 'Image', name))
+
+
+# Per data_type (reader, builder) pairs for the special-cased references.
+# The reader pulls every field the builder needs out of the datablock in one
+# call; the builder turns those already-read values into references.
+_SPECIAL_REFERENCE_HANDLERS = {
+    'materials': (_read_material_fields, _build_node_tree_owner_references),
+    'node_groups': (_read_node_group_fields, _build_node_tree_owner_references),
+    'worlds': (_read_world_fields, _build_node_tree_owner_references),
+    'scenes': (_read_scene_fields, _build_scene_references),
+    'collections': (_read_collection_fields, _build_collection_references),
+    'objects': (_read_object_fields, _build_object_references),
+    'particles': (_read_particle_fields, _build_particle_references),
+    'textures': (_read_texture_fields, _build_texture_references),
+}
+
+
+def _gather_datablocks(data_type, datablocks):
+    """
+    Gather phase of the dump: read name, library state and special fields for
+    every datablock of one data_type back-to-back.
+
+    Returns:
+        List of (datablock, item_name, special_fields) tuples
+    """
+    reader = _SPECIAL_REFERENCE_HANDLERS.get(data_type, (None, None))[0]
+    entries = []
+    for datablock in datablocks:
+        # Skip library-linked/override datablocks *except* for certain "reference-only"
+        # roots (not cleanable themselves) that can still reference local data that
+        # should not be flagged as unused (e.g. local materials assigned to linked objects).
+        try:
+            is_linked_or_override = _is_library_or_override(datablock)
+            if is_linked_or_override and data_type not in {'objects'}:
+                continue
+            item_name = datablock.name
+        except (AttributeError, RuntimeError, ReferenceError):
+            # Datablock may have been deleted or is invalid
+            continue
+
+        special_fields = None
+        if reader is not None:
+            try:
+                special_fields = reader(datablock)
+            except (AttributeError, RuntimeError, ReferenceError):
+                special_fields = None
+        entries.append((datablock, item_name, special_fields))
+    return entries
+
+
+# Data types that get only their special-case builder, no generic RNA walk.
+# A scene's walk descends into render, tool, view and sequencer settings. The
+# tracked IDs it could find there (world, camera, background set, collections)
+# are added by the scene builder or are roots of every analysis already.
+_SKIP_GENERIC = frozenset({'scenes'})
+
+
+def _process_datablock(datablock, item_name, special_fields, builder, references, generic=True):
+    """
+    Compute phase of the dump for one datablock: generic RNA walk followed by
+    the data_type's special-case builder, appending into references.
+
+    Per-item guards (modifiers, slots, nodes) live in the walk and builders;
+    anything else that fails aborts this datablock only and is handled by the
+    single guard in the caller.
+
+    Args:
+        generic: Run the generic RNA walk (False for data types in _SKIP_GENERIC)
+    """
+    if generic:
+        _extract_references_from_datablock(datablock, references, set())
+
+    # Special handling per data_type (node trees, scene roots, modifiers, ...)
+    if builder is not None and special_fields is not None:
+        builder(item_name, special_fields, references)
+
+
+def _item_to_json(item_data):
+    """Expand one item's reference/source tuples into {'property', 'type', 'name'} dicts for the JSON dump."""
+    return {
+        'references': [
+            {'property': prop, 'type': ref_type, 'name': name}
+            for prop, ref_type, name, _mapped in item_data['references']
+        ],
+        'referenced_by': [
+            {'type': source_type, 'name': source_name, 'property': prop}
+            for prop, source_type, source_name in item_data['referenced_by']
+        ],
+    }
+
+
+def _write_json(rna_data, output_path, pretty=False):
+    """
+    Write the dump to output_path: compact by default, indented two spaces
+    per level if pretty (for a file meant to be read).
+
+    The document is written one data-block record at a time, so only that
+    record's expanded JSON form is in memory at once.
+    """
+    if orjson is not None:
+        option = orjson.OPT_INDENT_2 if pretty else 0
+        
+        def encode(obj):
+            return orjson.dumps(obj, option=option)
+    else:
+        dump_options = {'indent': 2} if pretty else {'separators': (',', ':')}
+        
+        def encode(obj):
+            return json.dumps(obj, **dump_options).encode('utf-8')
+    
+    # Line breaks + indentation for the data_type and data-block levels; records
+    # are encoded on their own, so their lines get shifted to the record level
+    if pretty:
+        type_break, item_break, key_separator = b'\n  ', b'\n    ', b': '
+    else:
+        type_break, item_break, key_separator = b'', b'', b':'
+    
+    with open(output_path, 'wb') as f:
+        f.write(b'{')
+        for type_index, (data_type, items) in enumerate(rna_data.items()):
+            if type_index:
+                f.write(b',')
+            f.write(type_break + encode(data_type) + key_separator + b'{')
+            for item_index, (item_name, item_data) in enumerate(items.items()):
+                if item_index:
+                    f.write(b',')
+                record = encode(_item_to_json(item_data))
+                if pretty:
+                    record = record.replace(b'\n', item_break)
+                f.write(item_break + encode(item_name) + key_separator + record)
+            if items:
+                f.write(type_break)
+            f.write(b'}')
+        if rna_data and pretty:
+            f.write(b'\n')
+        f.write(b'}')
+
+
+def _walk_datablocks(data_block_types):
+    """
+    Walk every tracked datablock and yield (data_type, item_name, references)
+    for it, where references is a deduplicated list of _make_reference() tuples.
+
+    Shared by dump_rna_references() and build_graph_direct(). Every walk reads
+    every datablock: references aren't carried over from a previous walk,
+    since the depsgraph doesn't report edits to data outside the evaluated
+    scenes (orphan or fake-user data, other scenes) and stale references there
+    would get data reported unused that isn't.
+    """
+    # Create a snapshot of each data collection to avoid iteration issues
+    # This is critical when a new blend file is opened - old data-blocks become invalid
+    snapshots = {
+        data_type: _safe_snapshot(data_collection)
+        for data_type, data_collection in data_block_types.items()
+    }
+    
+    _node_tree_memo.clear()
+    
+    # Extract references from all data-blocks
+    # Wrap in try-except to handle crashes when collections become invalid
+    for data_type in data_block_types.keys():
+        try:
+            config.debug_print(f"[Atomic Debug] RNA Analysis: Processing {data_type}...")
+            
+            datablocks = snapshots[data_type]
+
+            # Keep datablocks of the same RNA subclass contiguous (ShaderNodeTree vs
+            # GeometryNodeTree, PointLight vs SunLight, ...) so consecutive
+            # introspection walks see the same property layout. Sorted by class
+            # name (stable sort), so dump and graph order match across sessions.
+            datablocks.sort(key=lambda datablock: type(datablock).__name__)
+
+            # Gather first, then compute: all RNA reads for this data_type happen
+            # back-to-back before any references are built.
+            entries = _gather_datablocks(data_type, datablocks)
+            builder = _SPECIAL_REFERENCE_HANDLERS.get(data_type, (None, None))[1]
+            generic = data_type not in _SKIP_GENERIC
+
+            for datablock, item_name, special_fields in entries:
+                references = []
                 try:
-                    if data_type == 'textures' and hasattr(datablock, 'image') and datablock.image and not compat.is_library_or_override(datablock.image):
-                        references.append({
-                            'property': 'image',
-                            'type': 'Image',
-                            'name': datablock.image.name
-                        })
+                    _process_datablock(datablock, item_name, special_fields, builder, references, generic)
                 except (AttributeError, RuntimeError, ReferenceError):
+                    # Datablock became invalid mid-walk; keep whatever was collected
                     pass
+                # The walk and the builders can find the same reference more than
+                # once (shared textures, node groups used twice, ...); keep one
+                references = list(dict.fromkeys(references))
                 
                 # Debug: Log references for Turf objects to trace the modifiers.texture issue
-                if item_name in ('Turf.001', 'Turf') and data_type == 'objects':
+                if config.enable_debug_prints and data_type == 'objects' and item_name in _DEBUG_ITEM_NAMES:
                     config.debug_print(f"[Atomic Debug] RNA Analysis: {item_name} references BEFORE storing: {references}")
-                    texture_refs = [r for r in references if 'texture' in r.get('property', '').lower()]
+                    texture_refs = [r for r in references if 'texture' in r[0].lower()]
                     config.debug_print(f"[Atomic Debug] RNA Analysis: {item_name} texture-related refs: {texture_refs}")
                 
-                # Store references
-                rna_data[data_type][item_name] = {
-                    'references': references,
-                    'referenced_by': []  # Will be populated in reverse pass
-                }
-                
-                # Build reverse reference map
-                for ref in references:
-                    ref_type = ref.get('type', '').lower()
-                    ref_name = ref.get('name', '')
-                    
-                    # Normalize Blender RNA identifiers to our type names
-                    # Handle patterns like 'Texture', 'TextureDatablock', 'bpy.types.Texture', etc.
-                    ref_type_normalized = ref_type
-                    if 'texture' in ref_type and 'datablock' not in ref_type:
-                        ref_type_normalized = 'texture'
-                    elif 'material' in ref_type and 'datablock' not in ref_type:
-                        ref_type_normalized = 'material'
-                    elif 'image' in ref_type and 'datablock' not in ref_type:
-                        ref_type_normalized = 'image'
-                    elif 'object' in ref_type and 'datablock' not in ref_type:
-                        ref_type_normalized = 'object'
-                    elif 'collection' in ref_type and 'datablock' not in ref_type:
-                        ref_type_normalized = 'collection'
-                    elif 'nodetree' in ref_type or 'nodegroup' in ref_type or 'node_tree' in ref_type:
-                        ref_type_normalized = 'nodetree'
-                    elif 'light' in ref_type and 'datablock' not in ref_type:
-                        ref_type_normalized = 'light'
-                    elif 'armature' in ref_type and 'datablock' not in ref_type:
-                        ref_type_normalized = 'armature'
-                    elif 'world' in ref_type and 'datablock' not in ref_type:
-                        ref_type_normalized = 'world'
-                    elif 'particlesettings' in ref_type or ('particle' in ref_type and 'settings' in ref_type):
-                        ref_type_normalized = 'particlesettings'
-                    elif 'mesh' in ref_type and 'datablock' not in ref_type:
-                        ref_type_normalized = 'mesh'
-                    elif 'scene' in ref_type and 'datablock' not in ref_type:
-                        ref_type_normalized = 'scene'
-                    
-                    # Map type names to our data_type keys
-                    type_mapping = {
-                        'image': 'images',
-                        'material': 'materials',
-                        'object': 'objects',
-                        'collection': 'collections',
-                        'nodetree': 'node_groups',
-                        'texture': 'textures',
-                        'light': 'lights',
-                        'armature': 'armatures',
-                        'world': 'worlds',
-                        'particlesettings': 'particles',
-                        'mesh': 'meshes',
-                        'scene': 'scenes',
-                    }
-                    
-                    mapped_type = type_mapping.get(ref_type_normalized, ref_type_normalized)
-                    if mapped_type in _DATA_BLOCK_TYPE_NAMES:
-                        if mapped_type not in reference_map:
-                            reference_map[mapped_type] = {}
-                        if ref_name not in reference_map[mapped_type]:
-                            reference_map[mapped_type][ref_name] = []
-                        
-                        reference_map[mapped_type][ref_name].append({
-                            'type': data_type,
-                            'name': item_name,
-                            'property': ref.get('property', '')
-                        })
+                yield data_type, item_name, references
         except Exception as e:
             # If processing this data_type fails (e.g., collection became invalid),
             # log and continue with next data_type
             config.debug_print(f"[Atomic Warning] RNA Analysis: Failed to process {data_type}: {e}")
             continue
     
-    # Populate reverse references
-    for data_type, items in reference_map.items():
-        for item_name, sources in items.items():
-            if data_type in rna_data and item_name in rna_data[data_type]:
-                rna_data[data_type][item_name]['referenced_by'] = sources
+    _node_tree_memo.clear()
+
+
+def dump_rna_references(output_path=None, pretty=False):
+    """
+    Dump all data-block references found via RNA introspection to JSON.
+    
+    Args:
+        output_path: Optional path to save JSON file. If None, returns dict.
+        pretty: Indent the JSON file for reading; compact by default.
+    
+    Returns:
+        Dictionary with structure: {data_type: {item_name: {references: [...], referenced_by: []}}}
+        where each reference is a (property, type, name, mapped_type) tuple and each
+        referenced_by entry a (property, source type, source name) tuple. The
+        JSON file spells both out as {'property', 'type', 'name'} objects.
+    """
+    config.debug_print("[Atomic Debug] RNA Analysis: Starting reference dump...")
+    
+    _library_state.clear()
+    rna_data = {}
+    reference_map = defaultdict(lambda: defaultdict(list))  # Track reverse references: {target_type: {target_name: [source_info]}}
+    
+    # Get fresh references to data-block types (critical after opening a new blend file)
+    try:
+        data_block_types = _get_data_block_types()
+    except Exception:
+        config.debug_print("[Atomic Debug] RNA Analysis: Failed to get data-block types, returning empty data")
+        if output_path:
+            _write_json({}, output_path)
+        return {}
+    
+    # Initialize structure
+    for data_type in data_block_types.keys():
+        rna_data[data_type] = {}
+    
+    for data_type, item_name, references in _walk_datablocks(data_block_types):
+        # Store references
+        rna_data[data_type][item_name] = {
+            'references': references,
+            # Shared with the reverse map, so sources found later are visible here
+            'referenced_by': reference_map[data_type][item_name]
+        }
+        
+        # Build reverse reference map
+        for ref_prop, _ref_type, ref_name, mapped_type in references:
+            if mapped_type is not None:
+                reference_map[mapped_type][ref_name].append((ref_prop, data_type, item_name))
     
     config.debug_print(f"[Atomic Debug] RNA Analysis: Reference dump complete. Processed {sum(len(items) for items in rna_data.values())} data-blocks.")
     
@@ -774,7 +1165,7 @@ def dump_rna_references(output_path=None):
             for item_name, item_data in items.items():
                 refs = item_data.get('references', [])
                 if refs and sample_count < 5:
-                    config.debug_print(f"[Atomic Debug] RNA Sample: {data_type}.{item_name} references: {[r.get('name') for r in refs[:3]]}")
+                    config.debug_print(f"[Atomic Debug] RNA Sample: {data_type}.{item_name} references: {[r[2] for r in refs[:3]]}")
                     sample_count += 1
                     if sample_count >= 5:
                         break
@@ -784,8 +1175,7 @@ def dump_rna_references(output_path=None):
     # Save to file if path provided
     if output_path:
         try:
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(rna_data, f, indent=2)
+            _write_json(rna_data, output_path, pretty)
             config.debug_print(f"[Atomic Debug] RNA Analysis: Saved to {output_path}")
         except Exception as e:
             config.debug_print(f"[Atomic Error] RNA Analysis: Failed to save dump: {e}")
@@ -808,102 +1198,506 @@ def build_dependency_graph(rna_data):
     graph = {}
     
     # Initialize graph structure
-    for data_type in _DATA_BLOCK_TYPE_NAMES:
+    for data_type in _DATA_BLOCK_TYPE_ORDER:
         graph[data_type] = {}
     
+    # Node names are interned: the same names recur as keys, edges and roots,
+    # and interned strings compare by identity in set/dict lookups
+    intern = sys.intern
+    
     # Build forward references (what this references)
     for data_type, items in rna_data.items():
         for item_name, item_data in items.items():
+            item_name = intern(item_name)
             if data_type not in graph:
                 graph[data_type] = {}
             
             if item_name not in graph[data_type]:
                 graph[data_type][item_name] = {
-                    'references': set(),
-                    'referenced_by': set()
+                    'references': [],
+                    'referenced_by': []
                 }
             
             # Add forward references
-            for ref in item_data.get('references', []):
-                ref_type = ref.get('type', '').lower()
-                ref_name = ref.get('name', '')
-                
-                # Normalize Blender RNA identifiers to our type names (same as in dump_rna_references)
-                ref_type_normalized = ref_type
-                if 'texture' in ref_type and 'datablock' not in ref_type:
-                    ref_type_normalized = 'texture'
-                elif 'material' in ref_type and 'datablock' not in ref_type:
-                    ref_type_normalized = 'material'
-                elif 'image' in ref_type and 'datablock' not in ref_type:
-                    ref_type_normalized = 'image'
-                elif 'object' in ref_type and 'datablock' not in ref_type:
-                    ref_type_normalized = 'object'
-                elif 'collection' in ref_type and 'datablock' not in ref_type:
-                    ref_type_normalized = 'collection'
-                elif 'nodetree' in ref_type or 'nodegroup' in ref_type or 'node_tree' in ref_type:
-                    ref_type_normalized = 'nodetree'
-                elif 'light' in ref_type and 'datablock' not in ref_type:
-                    ref_type_normalized = 'light'
-                elif 'armature' in ref_type and 'datablock' not in ref_type:
-                    ref_type_normalized = 'armature'
-                elif 'world' in ref_type and 'datablock' not in ref_type:
-                    ref_type_normalized = 'world'
-                elif 'particlesettings' in ref_type or ('particle' in ref_type and 'settings' in ref_type):
-                    ref_type_normalized = 'particlesettings'
-                elif 'mesh' in ref_type and 'datablock' not in ref_type:
-                    ref_type_normalized = 'mesh'
-                elif 'scene' in ref_type and 'datablock' not in ref_type:
-                    ref_type_normalized = 'scene'
-                
-                # Map type names
-                type_mapping = {
-                    'image': 'images',
-                    'material': 'materials',
-                    'object': 'objects',
-                    'collection': 'collections',
-                    'nodetree': 'node_groups',
-                    'texture': 'textures',
-                    'light': 'lights',
-                    'armature': 'armatures',
-                    'world': 'worlds',
-                    'particlesettings': 'particles',
-                    'mesh': 'meshes',
-                    'scene': 'scenes',
-                }
-                
-                mapped_type = type_mapping.get(ref_type_normalized, ref_type_normalized)
-                if mapped_type in _DATA_BLOCK_TYPE_NAMES:
-                    graph[data_type][item_name]['references'].add((mapped_type, ref_name))
+            for _ref_prop, _ref_type, ref_name, mapped_type in item_data.get('references', []):
+                if mapped_type is not None:
+                    graph[data_type][item_name]['references'].append((mapped_type, intern(ref_name)))
     
     # Build reverse references (what references this)
     for data_type, items in rna_data.items():
         for item_name, item_data in items.items():
-            for source in item_data.get('referenced_by', []):
-                source_type = source.get('type', '')
-                source_name = source.get('name', '')
-                
+            item_name = intern(item_name)
+            for _source_prop, source_type, source_name in item_data.get('referenced_by', []):
                 if source_type in _DATA_BLOCK_TYPE_NAMES:
+                    source_name = intern(source_name)
                     if source_type not in graph:
                         graph[source_type] = {}
                     if source_name not in graph[source_type]:
                         graph[source_type][source_name] = {
-                            'references': set(),
-                            'referenced_by': set()
+                            'references': [],
+                            'referenced_by': []
                         }
 
                     # Record reverse edge (target <- source)
-                    graph[source_type][source_name]['referenced_by'].add((data_type, item_name))
+                    graph[source_type][source_name]['referenced_by'].append((data_type, item_name))
 
                     # IMPORTANT: also ensure the corresponding forward edge exists.
                     # Some Blender datablocks show up only in reverse discovery (e.g. certain
                     # linked/override modifier texture users) which would otherwise break
                     # reachability traversal from roots.
-                    graph[source_type][source_name]['references'].add((data_type, item_name))
+                    graph[source_type][source_name]['references'].append((data_type, item_name))
+    
+    # Edges were collected in lists; dedupe them into sets in one go, which is
+    # cheaper than a set.add() per edge
+    for items in graph.values():
+        for node in items.values():
+            node['references'] = set(node['references'])
+            node['referenced_by'] = set(node['referenced_by'])
+    
+    config.debug_print("[Atomic Debug] RNA Analysis: Dependency graph built.")
+    return graph
+
+
+def build_graph_direct():
+    """
+    Walk the RNA references and build the dependency graph in one pass.
+    
+    Produces the same graph as build_dependency_graph(dump_rna_references())
+    without materializing the intermediate rna_data or the reverse map; use
+    dump_rna_references() when the JSON dump itself is wanted.
+    
+    Returns:
+        Dictionary with structure: {data_type: {item_name: {'references': set(...), 'referenced_by': set(...)}}}
+    """
+    config.debug_print("[Atomic Debug] RNA Analysis: Building dependency graph from RNA walk...")
+    
+    _library_state.clear()
+    graph = {data_type: {} for data_type in _DATA_BLOCK_TYPE_ORDER}
+    intern = sys.intern
+    
+    try:
+        data_block_types = _get_data_block_types()
+    except Exception:
+        config.debug_print("[Atomic Debug] RNA Analysis: Failed to get data-block types, returning empty graph")
+        return graph
+    
+    for data_type, item_name, references in _walk_datablocks(data_block_types):
+        graph.setdefault(data_type, {})[intern(item_name)] = {
+            'references': {
+                (mapped_type, intern(ref_name))
+                for _ref_prop, _ref_type, ref_name, mapped_type in references
+                if mapped_type is not None
+            },
+            'referenced_by': set(),
+        }
+    
+    # Mirror build_dependency_graph()'s reverse pass: every edge whose target
+    # was itself walked is also recorded in the source's referenced_by
+    for items in graph.values():
+        for node in items.values():
+            node['referenced_by'].update(
+                ref for ref in node['references']
+                if ref[1] in graph.get(ref[0], ())
+            )
     
     config.debug_print("[Atomic Debug] RNA Analysis: Dependency graph built.")
     return graph
 
 
+# Bump when the graph layout or reference extraction changes, so graphs
+# cached by an older version are never loaded
+_GRAPH_CACHE_VERSION = 3
+
+# The add-on's root package; the graph cache lives in its per-user directory
+_ADDON_PACKAGE = __package__.rsplit('.', 1)[0]
+
+# Add-on version from blender_manifest.toml, read on first use
+_addon_version = None
+
+
+def _get_addon_version():
+    """The add-on's manifest version, or 'unknown' if it can't be read."""
+    global _addon_version
+    if _addon_version is None:
+        manifest_path = os.path.join(
+            os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            "blender_manifest.toml",
+        )
+        try:
+            import tomllib
+            with open(manifest_path, 'rb') as manifest_file:
+                _addon_version = str(tomllib.load(manifest_file).get('version', 'unknown'))
+        except Exception:
+            _addon_version = 'unknown'
+    return _addon_version
+
+
+def _graph_fingerprint():
+    """
+    Fingerprint of the saved blend file for the on-disk graph cache.
+    
+    Covers the Blender and add-on versions, the file's path and modification
+    time, per-type data-block counts and the path and modification time of
+    every linked library, since edits to a library change what the file's
+    data-blocks reference. A new Blender or add-on version may lay out RNA or
+    extract references differently, so it never loads an older graph.
+    
+    Returns None when the file is unsaved or has unsaved changes, since the
+    saved file then no longer describes the data in memory.
+    """
+    blend_path = bpy.data.filepath
+    if not blend_path or bpy.data.is_dirty:
+        return None
+    try:
+        mtime = os.path.getmtime(blend_path)
+        counts = '|'.join(
+            f"{data_type}:{len(data_collection)}"
+            for data_type, data_collection in _get_data_block_types().items()
+        )
+        libraries = []
+        for library in bpy.data.libraries:
+            library_path = bpy.path.abspath(library.filepath)
+            try:
+                library_mtime = os.path.getmtime(library_path)
+            except OSError:
+                library_mtime = 'missing'
+            libraries.append(f"{library_path}:{library_mtime}")
+    except Exception:
+        return None
+    versions = f"{_GRAPH_CACHE_VERSION}|{bpy.app.version}|{_get_addon_version()}"
+    key = f"{versions}|{blend_path}|{mtime}|{counts}|{'|'.join(sorted(libraries))}"
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def _graph_cache_dir():
+    """The add-on's per-user graph cache directory, or None if unavailable."""
+    try:
+        return bpy.utils.extension_path_user(_ADDON_PACKAGE, path="graph_cache", create=True)
+    except Exception:
+        return None
+
+
+def _graph_cache_path(cache_dir, blend_path):
+    """
+    Path of the cached dependency graph for a blend file. One entry per file,
+    so saving a new graph for it replaces the stale one.
+    """
+    path_hash = hashlib.sha256(blend_path.encode('utf-8')).hexdigest()
+    return os.path.join(cache_dir, f"graph_{path_hash[:16]}.json")
+
+
+def clear_graph_cache():
+    """Delete every cached dependency graph."""
+    cache_dir = _graph_cache_dir()
+    if cache_dir is None:
+        return
+    try:
+        file_names = os.listdir(cache_dir)
+    except OSError:
+        return
+    for file_name in file_names:
+        if file_name.startswith('graph_'):
+            try:
+                os.remove(os.path.join(cache_dir, file_name))
+            except OSError as e:
+                config.debug_print(f"[Atomic Debug] RNA Analysis: Could not remove graph cache {file_name}: {e}")
+
+
+def _graph_to_json(graph):
+    """Dependency graph as JSON-safe edge lists: {data_type: {name: [references, referenced_by]}}."""
+    return {
+        data_type: {
+            item_name: [
+                [list(ref) for ref in node['references']],
+                [list(ref) for ref in node['referenced_by']],
+            ]
+            for item_name, node in items.items()
+        }
+        for data_type, items in graph.items()
+    }
+
+
+def _graph_from_json(data):
+    """Inverse of _graph_to_json(), with names interned as in build_dependency_graph()."""
+    intern = sys.intern
+    return {
+        intern(data_type): {
+            intern(item_name): {
+                'references': {(intern(ref_type), intern(ref_name)) for ref_type, ref_name in references},
+                'referenced_by': {(intern(ref_type), intern(ref_name)) for ref_type, ref_name in referenced_by},
+            }
+            for item_name, (references, referenced_by) in items.items()
+        }
+        for data_type, items in data.items()
+    }
+
+
+def get_or_build_graph():
+    """
+    Return the dependency graph, loading it from the on-disk cache if possible.
+    
+    With config.enable_graph_cache off, or when the blend file has unsaved
+    changes, this is just build_graph_direct(). Otherwise a graph cached for
+    the same saved file (see _graph_fingerprint()) is reused, and a freshly
+    built one replaces the file's cache entry. The cache is plain JSON in the
+    add-on's per-user directory. Cache IO errors are never fatal.
+    """
+    if not config.enable_graph_cache:
+        return build_graph_direct()
+    
+    fingerprint = _graph_fingerprint()
+    cache_dir = _graph_cache_dir() if fingerprint is not None else None
+    if cache_dir is None:
+        return build_graph_direct()
+    
+    cache_path = _graph_cache_path(cache_dir, bpy.data.filepath)
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if cached.get('fingerprint') == fingerprint:
+            graph = _graph_from_json(cached['graph'])
+            config.debug_print(f"[Atomic Debug] RNA Analysis: Loaded dependency graph from {cache_path}")
+            return graph
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        config.debug_print(f"[Atomic Debug] RNA Analysis: Ignoring unreadable graph cache: {e}")
+    
+    graph = build_graph_direct()
+    
+    # Atomic write: write to temp file first, then rename
+    temp_path = cache_path + '.tmp'
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'fingerprint': fingerprint, 'graph': _graph_to_json(graph)}, f, separators=(',', ':'))
+        os.replace(temp_path, cache_path)
+    except Exception as e:
+        config.debug_print(f"[Atomic Debug] RNA Analysis: Failed to save graph cache: {e}")
+    
+    return graph
+
+
+# Special do_not_flag names per category
+_DO_NOT_FLAG = {
+    'images': frozenset(("Render Result", "Viewer Node", "D-NOISE Export")),
+}
+
+# Type-level reachability for the most recently analyzed graph; analyze_unused_from_graph()
+# is called once per category against the same graph
+_types_reaching_cache = {'graph': None, 'parents': None, 'by_category': {}}
+
+
+def _types_reaching(graph, category):
+    """
+    Data types whose nodes can transitively reference a node of category in
+    this graph (category included). Derived from the graph's own edges, so a
+    node of any other type can't lead to the category and needn't be traversed.
+    """
+    cache = _types_reaching_cache
+    if cache['graph'] is not graph:
+        # Type-level reverse adjacency: referenced type -> referencing types
+        parents = defaultdict(set)
+        for data_type, items in graph.items():
+            for item_data in items.values():
+                for ref_type, _ref_name in item_data['references']:
+                    parents[ref_type].add(data_type)
+        cache['graph'] = graph
+        cache['parents'] = parents
+        cache['by_category'] = {}
+    
+    reaching = cache['by_category'].get(category)
+    if reaching is None:
+        parents = cache['parents']
+        reaching = {category}
+        stack = [category]
+        while stack:
+            for parent in parents.get(stack.pop(), ()):
+                if parent not in reaching:
+                    reaching.add(parent)
+                    stack.append(parent)
+        cache['by_category'][category] = reaching
+    return reaching
+
+
+# Flattened adjacency of the most recently analyzed graph, see flatten_graph()
+_flat_graph_cache = {'graph': None, 'flat': None}
+
+
+def flatten_graph(graph):
+    """
+    Int-encode the graph's forward edges as compressed sparse rows.
+    
+    Every node, and every edge target missing from the graph, gets a dense
+    int id; indices[indptr[u]:indptr[u + 1]] are the ids node u references.
+    The result is cached for the most recently flattened graph.
+    
+    Returns:
+        (indptr, indices, id_to_key, key_to_id), where id_to_key[u] is the
+        (data_type, item_name) of node u and key_to_id its inverse
+    """
+    cache = _flat_graph_cache
+    if cache['graph'] is graph:
+        return cache['flat']
+    
+    id_to_key = []
+    key_to_id = {}
+    for data_type, items in graph.items():
+        for item_name in items:
+            key = (data_type, item_name)
+            key_to_id[key] = len(id_to_key)
+            id_to_key.append(key)
+    
+    indptr = [0]
+    indices = []
+    for u in range(len(id_to_key)):
+        data_type, item_name = id_to_key[u]
+        for ref in graph[data_type][item_name]['references']:
+            v = key_to_id.get(ref)
+            if v is None:
+                # Edge to a node the graph doesn't have; still traversable
+                v = key_to_id[ref] = len(id_to_key)
+                id_to_key.append(ref)
+            indices.append(v)
+        indptr.append(len(indices))
+    
+    # Targets added above have no outgoing edges
+    indptr.extend([len(indices)] * (len(id_to_key) + 1 - len(indptr)))
+    
+    flat = (indptr, indices, id_to_key, key_to_id)
+    cache['graph'] = graph
+    cache['flat'] = flat
+    return flat
+
+
+def _fake_user_datablocks(data_collection):
+    """
+    Data-blocks of a bpy.data collection that have a fake user.
+    
+    Reads use_fake_user for the whole collection in one foreach_get() call and
+    only fetches the flagged items; falls back to per-item reads where the
+    collection doesn't support it. Empty collections cost a len().
+    """
+    try:
+        count = len(data_collection)
+    except Exception:
+        count = None
+    if count == 0:
+        return []
+    
+    if count is not None:
+        flags = [False] * count
+        try:
+            data_collection.foreach_get('use_fake_user', flags)
+            return [data_collection[index] for index, flag in enumerate(flags) if flag]
+        except (AttributeError, TypeError, RuntimeError, IndexError):
+            pass
+    
+    # Create a snapshot to avoid iteration issues
+    fake_users = []
+    for datablock in _safe_snapshot(data_collection):
+        try:
+            if datablock is not None and getattr(datablock, 'use_fake_user', False):
+                fake_users.append(datablock)
+        except (RuntimeError, ReferenceError):
+            # Datablock may be invalid
+            continue
+    return fake_users
+
+
+# Object type -> data_type of its object data
+_OBJ_DATA_TYPE_MAP = {
+    'LIGHT': 'lights',
+    'MESH': 'meshes',
+    'ARMATURE': 'armatures',
+    'CURVE': 'curves',
+    'SURFACE': 'curves',  # Surface objects also use curve data
+    'FONT': 'curves',  # Font objects also use curve data
+    'META': 'metaballs',
+    'LATTICE': 'lattices',
+    'VOLUME': 'volumes',
+}
+
+
+def _walked_object_names(graph):
+    """
+    Names of the graph's object entries that can only describe a local object.
+    
+    The graph keys objects by bare name, so a local object sharing its name with
+    a linked one may have the linked object's entry; those names are left out.
+    """
+    walked_names = set(graph.get('objects', ()))
+    if not walked_names or not bpy.data.libraries:
+        return walked_names
+    for obj in _safe_iter(bpy.data.objects):
+        try:
+            if obj.library:
+                walked_names.discard(obj.name)
+        except (AttributeError, RuntimeError, ReferenceError):
+            continue
+    return walked_names
+
+
+def _add_object_as_root(obj, roots, seen, walked_names, scan_modifiers):
+    """
+    Add an object in a scene as a root, along with its object data and the
+    node groups of its geometry nodes modifiers.
+    
+    Args:
+        obj: The object
+        roots: Set of (data_type, name) roots to add to
+        seen: Struct keys of objects already added
+        walked_names: Names of local objects whose graph entry is their own
+            (see _walked_object_names())
+        scan_modifiers: Always add modifier node groups as roots. Otherwise
+            they are only added for linked/override objects and objects
+            missing from the graph; for the rest, the object's own
+            modifiers.node_group edges reach them.
+    """
+    if obj is None:
+        return
+    try:
+        key = _struct_key(obj)
+        if key in seen:
+            return
+        seen.add(key)
+        
+        # IMPORTANT: include linked/override objects as roots so their references
+        # (e.g. local materials assigned to linked objects, textures in Displace
+        # modifiers) are treated as used.
+        obj_name = obj.name
+        roots.add(('objects', obj_name))
+
+        # Also mark the object's data-block as used (for lights, meshes, armatures, etc.)
+        # Dispatch on obj.type first; other object types' data is never read
+        data_type = _OBJ_DATA_TYPE_MAP.get(getattr(obj, 'type', None))
+        if data_type is not None:
+            try:
+                obj_data = obj.data
+                if obj_data and not _is_library_or_override(obj_data):
+                    roots.add((data_type, obj_data.name))
+            except (AttributeError, RuntimeError, ReferenceError):
+                pass
+
+        # Also mark node groups used by object modifiers (e.g., Geometry Nodes modifiers)
+        if not scan_modifiers and obj_name in walked_names and not _is_library_or_override(obj):
+            return
+        obj_modifiers = getattr(obj, 'modifiers', None)
+        if obj_modifiers is not None:
+            for modifier in _safe_iter(obj_modifiers):
+                if modifier is None:
+                    continue
+                try:
+                    if _is_geometry_nodes_modifier(modifier):
+                        ng = compat.get_geometry_nodes_modifier_node_group(modifier)
+                        if ng and not _is_library_or_override(ng):
+                            roots.add(('node_groups', ng.name))
+                except (AttributeError, RuntimeError, ReferenceError):
+                    continue
+    except (AttributeError, RuntimeError, ReferenceError):
+        # Object may have been deleted or is invalid
+        pass
+
+
 def analyze_unused_from_graph(graph, category, include_fake_users=None):
     """
     Determine unused items using the dependency graph.
@@ -927,11 +1721,14 @@ def analyze_unused_from_graph(graph, category, include_fake_users=None):
         config.debug_print(f"[Atomic Warning] RNA Analysis: Unknown category '{category}'")
         return []
     
-    # Mark all items as unused initially
-    used = set()
+    _library_state.clear()
     
-    # Find root items (those that are directly used in scenes/view layers)
-    roots = []
+    # Fresh references for this call (stale after opening a new blend file)
+    data_block_types = _get_data_block_types()
+    
+    # Find root items (those that are directly used in scenes/view layers);
+    # a set, since scenes, collections and fake users name the same items often
+    roots = set()
     
     # Debug: Check if graph has any data
     if config.enable_debug_prints:
@@ -950,7 +1747,7 @@ def analyze_unused_from_graph(graph, category, include_fake_users=None):
     def get_all_scene_collections(root_collection):
         """Recursively get all collections in the scene hierarchy."""
         collections = []
-        if root_collection and not compat.is_library_or_override(root_collection):
+        if root_collection and not _is_library_or_override(root_collection):
             try:
                 collections.append(root_collection)
                 # Add all descendant collections
@@ -963,7 +1760,7 @@ def analyze_unused_from_graph(graph, category, include_fake_users=None):
                     if child is None:
                         continue
                     try:
-                        if not compat.is_library_or_override(child):
+                        if not _is_library_or_override(child):
                             collections.append(child)
                     except (AttributeError, RuntimeError, ReferenceError):
                         # Child may be invalid
@@ -973,161 +1770,58 @@ def analyze_unused_from_graph(graph, category, include_fake_users=None):
                 pass
         return collections
     
-    # Objects in scenes/view layers (directly in scene.objects)
+    # An object in several collections/scenes is only added once
+    seen_objects = set()
+    walked_names = _walked_object_names(graph)
+    # Modifier node groups only need explicit roots when node groups are what's
+    # being analyzed; other categories reach them through the object's edges
+    scan_modifiers = category == 'node_groups'
     for scene in bpy.data.scenes:
-        if compat.is_library_or_override(scene):
+        if _is_library_or_override(scene):
             continue
         
         # Add scene itself as a root so its references (compositor node tree, world, etc.) are traversed
         try:
-            roots.append(('scenes', scene.name))
+            scene_name = scene.name
         except (AttributeError, RuntimeError, ReferenceError):
             # Scene may be invalid
-            pass
-        
-        # Create a snapshot to avoid iteration issues
-        scene_objects = _safe_snapshot(scene.objects)
-        
-        for obj in scene_objects:
-            if obj is None:
-                continue
-            try:
-                # IMPORTANT: include linked/override objects as roots so their references
-                # (e.g. local materials assigned to linked objects) are treated as used.
-                roots.append(('objects', obj.name))
-
-                # Also mark the object's data-block as used (for lights, meshes, armatures, etc.)
-                if hasattr(obj, 'data') and obj.data and hasattr(obj.data, 'name'):
-                    try:
-                        data_type_map = {
-                            'LIGHT': 'lights',
-                            'MESH': 'meshes',
-                            'ARMATURE': 'armatures',
-                            'CURVE': 'curves',
-                            'SURFACE': 'curves',  # Surface objects also use curve data
-                            'FONT': 'curves',  # Font objects also use curve data
-                            'META': 'metaballs',
-                            'LATTICE': 'lattices',
-                            'VOLUME': 'volumes',
-                        }
-                        obj_type = obj.type
-                        if obj_type in data_type_map:
-                            data_type = data_type_map[obj_type]
-                            if not compat.is_library_or_override(obj.data):
-                                roots.append((data_type, obj.data.name))
-                    except (AttributeError, RuntimeError, ReferenceError):
-                        pass
-
-                # Also mark node groups used by object modifiers (e.g., Geometry Nodes modifiers)
-                if hasattr(obj, 'modifiers'):
-                    try:
-                        modifiers = list(obj.modifiers)
-                    except (RuntimeError, ReferenceError):
-                        modifiers = []
-
-                    for modifier in modifiers:
-                        if modifier is None:
-                            continue
-                        try:
-                            if compat.is_geometry_nodes_modifier(modifier):
-                                ng = compat.get_geometry_nodes_modifier_node_group(modifier)
-                                if ng and not compat.is_library_or_override(ng):
-                                    roots.append(('node_groups', ng.name))
-                        except (AttributeError, RuntimeError, ReferenceError):
-                            continue
-            except (AttributeError, RuntimeError, ReferenceError):
-                # Object may have been deleted or is invalid
-                continue
+            scene_name = None
+        if scene_name is not None:
+            roots.add(('scenes', scene_name))
         
         # World assigned to scene
-        if scene.world and not compat.is_library_or_override(scene.world):
-            roots.append(('worlds', scene.world.name))
+        world = scene.world
+        if world and not _is_library_or_override(world):
+            roots.add(('worlds', world.name))
         
         # Collections in scene (including root collection and all descendants)
         scene_collections = get_all_scene_collections(scene.collection)
         for collection in scene_collections:
-            roots.append(('collections', collection.name))
+            roots.add(('collections', collection.name))
         
         # RigidBodyWorld collection (physics world)
-        if hasattr(scene, 'rigidbody_world') and scene.rigidbody_world:
-            if hasattr(scene.rigidbody_world, 'collection') and scene.rigidbody_world.collection:
-                if not compat.is_library_or_override(scene.rigidbody_world.collection):
-                    roots.append(('collections', scene.rigidbody_world.collection.name))
+        rigidbody_world = getattr(scene, 'rigidbody_world', None)
+        if rigidbody_world:
+            rigidbody_collection = getattr(rigidbody_world, 'collection', None)
+            if rigidbody_collection and not _is_library_or_override(rigidbody_collection):
+                roots.add(('collections', rigidbody_collection.name))
         
-        # Objects in collections that are in scenes (via collection.objects)
-        # This ensures objects in collections are marked as used
-        # Note: The graph traversal should also handle this, but we add them explicitly as a safety measure
-        for collection in scene_collections:
-            # Create a snapshot to avoid iteration issues
-            collection_objects = _safe_snapshot(collection.objects)
-            
-            for obj in collection_objects:
-                if obj is None:
-                    continue
-                try:
-                    # IMPORTANT: include linked/override objects as roots so their references
-                    # (e.g. textures in Displace modifiers, materials, etc.) are traversed.
-                    roots.append(('objects', obj.name))
-                    
-                    # Also mark the object's data-block as used (for lights, meshes, armatures, etc.)
-                    if hasattr(obj, 'data') and obj.data and hasattr(obj.data, 'name'):
-                        try:
-                            data_type_map = {
-                                'LIGHT': 'lights',
-                                'MESH': 'meshes',
-                                'ARMATURE': 'armatures',
-                                'CURVE': 'curves',
-                                'SURFACE': 'curves',  # Surface objects also use curve data
-                                'FONT': 'curves',  # Font objects also use curve data
-                                'META': 'metaballs',
-                                'LATTICE': 'lattices',
-                                'VOLUME': 'volumes',
-                            }
-                            obj_type = obj.type
-                            if obj_type in data_type_map:
-                                data_type = data_type_map[obj_type]
-                                if not compat.is_library_or_override(obj.data):
-                                    roots.append((data_type, obj.data.name))
-                        except (AttributeError, RuntimeError, ReferenceError):
-                            pass
-                    
-                    # Also mark node groups used by object modifiers (e.g., Geometry Nodes modifiers)
-                    if hasattr(obj, 'modifiers'):
-                        try:
-                            modifiers = list(obj.modifiers)
-                        except (RuntimeError, ReferenceError):
-                            modifiers = []
-                        
-                        for modifier in modifiers:
-                            if modifier is None:
-                                continue
-                            try:
-                                if compat.is_geometry_nodes_modifier(modifier):
-                                    ng = compat.get_geometry_nodes_modifier_node_group(modifier)
-                                    if ng and not compat.is_library_or_override(ng):
-                                        roots.append(('node_groups', ng.name))
-                            except (AttributeError, RuntimeError, ReferenceError):
-                                continue
-                except (AttributeError, RuntimeError, ReferenceError):
-                    # Object may have been deleted or is invalid
-                    continue
+        # Objects in the scene (scene.objects) and in its collections (collection.objects)
+        # The graph traversal should also reach the latter, but we add them explicitly as a
+        # safety measure. The sources overlap heavily, so walk their union once.
+        # Nothing here changes the scene, so the sources are iterated in place.
+        for source in (scene.objects, *(collection.objects for collection in scene_collections)):
+            for obj in _safe_iter(source):
+                _add_object_as_root(obj, roots, seen_objects, walked_names, scan_modifiers)
     
     # Fake users
     if not include_fake_users:
         try:
-            data_block_types = _get_data_block_types()
             for data_type, data_collection in data_block_types.items():
-                # Create a snapshot to avoid iteration issues
-                datablocks = _safe_snapshot(data_collection)
-                
-                for datablock in datablocks:
-                    if datablock is None:
-                        continue
+                for datablock in _fake_user_datablocks(data_collection):
                     try:
-                        if compat.is_library_or_override(datablock):
-                            continue
-                        if hasattr(datablock, 'use_fake_user') and datablock.use_fake_user:
-                            roots.append((data_type, datablock.name))
+                        if not _is_library_or_override(datablock):
+                            roots.add((data_type, datablock.name))
                     except (AttributeError, RuntimeError, ReferenceError):
                         # Datablock may be invalid
                         continue
@@ -1135,39 +1829,52 @@ def analyze_unused_from_graph(graph, category, include_fake_users=None):
             # If accessing data-block types fails, skip fake user check
             pass
     
-    # Traverse graph from roots
-    visited = set()
-    queue = list(roots)
+    # Traverse graph from roots over its int-encoded adjacency; everything
+    # visited is used. Nodes of a type that can't lead to the category are
+    # never enqueued.
+    reaching = _types_reaching(graph, category)
+    indptr, indices, id_to_key, key_to_id = flatten_graph(graph)
     
-    while queue:
-        data_type, item_name = queue.pop(0)
-        
-        if (data_type, item_name) in visited:
+    # Names never flagged: roots the graph doesn't know (they are used, just
+    # have nothing to traverse), plus the category's do-not-flag names
+    skip_names = set(_DO_NOT_FLAG.get(category, frozenset()))
+    
+    # One byte per node id. Nodes are marked when enqueued, so a node many
+    # items reference is queued once rather than once per referencing item.
+    visited = bytearray(len(id_to_key))
+    queue = deque()
+    enqueue = queue.append
+    for root in roots:
+        if root[0] not in reaching:
             continue
-        
-        visited.add((data_type, item_name))
-        used.add((data_type, item_name))
+        u = key_to_id.get(root)
+        if u is not None:
+            visited[u] = 1
+            enqueue(u)
+        elif root[0] == category:
+            skip_names.add(root[1])
+    
+    popleft = queue.popleft
+    while queue:
+        u = popleft()
         
         # Follow forward references (what this item references)
-        if data_type in graph and item_name in graph[data_type]:
-            for ref_type, ref_name in graph[data_type][item_name]['references']:
-                if (ref_type, ref_name) not in visited:
-                    queue.append((ref_type, ref_name))
+        for v in indices[indptr[u]:indptr[u + 1]]:
+            if not visited[v] and id_to_key[v][0] in reaching:
+                visited[v] = 1
+                enqueue(v)
+    
+    # Everything the traversal reached in this category is used
+    skip_names.update(
+        item_name for (data_type, item_name), seen in zip(id_to_key, visited)
+        if seen and data_type == category
+    )
     
     # Find unused items in the requested category
     unused = []
     
-    # Special do_not_flag lists
-    do_not_flag = {
-        'images': ["Render Result", "Viewer Node", "D-NOISE Export"]
-    }
-    
-    category_do_not_flag = do_not_flag.get(category, [])
-    
     # Iterate over all data-blocks in the category
     try:
-        # Get fresh reference to avoid stale data after opening new blend file
-        data_block_types = _get_data_block_types()
         if category not in data_block_types:
             category_datablocks = []
         else:
@@ -1181,29 +1888,28 @@ def analyze_unused_from_graph(graph, category, include_fake_users=None):
         if datablock is None:
             continue
         try:
-            if compat.is_library_or_override(datablock):
+            if _is_library_or_override(datablock):
                 continue
             
             item_name = datablock.name
-            if (category, item_name) not in used:
-                if item_name not in category_do_not_flag:
-                    # Objects that appear in a scene collection must stay (traceable to a scene), even
-                    # if the RNA graph missed them (e.g. mesh parented to an out-of-scene armature).
-                    if category == 'objects':
-                        try:
-                            if users.object_all(item_name):
+            if item_name not in skip_names:
+                # Objects that appear in a scene collection must stay (traceable to a scene), even
+                # if the RNA graph missed them (e.g. mesh parented to an out-of-scene armature).
+                if category == 'objects':
+                    try:
+                        if users.object_all(item_name):
+                            continue
+                    except (AttributeError, KeyError, RuntimeError, ReferenceError):
+                        pass
+                if category == 'materials':
+                    try:
+                        if datablock.users > 0 and not datablock.use_fake_user:
+                            if not ghost_users.material_blender_users_fully_cc3_ghosts(
+                                    datablock):
                                 continue
-                        except (AttributeError, KeyError, RuntimeError, ReferenceError):
-                            pass
-                    if category == 'materials':
-                        try:
-                            if datablock.users > 0 and not datablock.use_fake_user:
-                                if not ghost_users.material_blender_users_fully_cc3_ghosts(
-                                        datablock):
-                                    continue
-                        except (AttributeError, RuntimeError, ReferenceError):
-                            pass
-                    unused.append(item_name)
+                    except (AttributeError, RuntimeError, ReferenceError):
+                        pass
+                unused.append(item_name)
         except (AttributeError, RuntimeError, ReferenceError):
             # Datablock may be invalid
             continue
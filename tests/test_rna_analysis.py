@@ -0,0 +1,99 @@
+"""
+Tests for stats/rna_analysis.py. They need Blender's Python module (the
+`bpy` wheel or Blender's bundled interpreter) and are skipped without it.
+"""
+
+import importlib
+import os
+import sys
+
+import pytest
+
+bpy = pytest.importorskip("bpy")
+
+# The repository root is the add-on package; import it by its directory name
+_ADDON_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(_ADDON_ROOT))
+rna_analysis = importlib.import_module(
+    f"{os.path.basename(_ADDON_ROOT)}.stats.rna_analysis")
+
+
+@pytest.fixture
+def empty_file():
+    bpy.ops.wm.read_factory_settings(use_empty=True)
+    rna_analysis.invalidate_cache()
+    yield
+    rna_analysis.invalidate_cache()
+
+
+def _walk(datablock):
+    references = []
+    rna_analysis._extract_references_from_datablock(datablock, references, set())
+    return references
+
+
+def test_id_identifiers_are_item_types(empty_file):
+    identifiers = rna_analysis._get_id_rna_identifiers()
+    assert {'Object', 'Material', 'Image', 'World'} <= identifiers
+    assert 'BlendDataObjects' not in identifiers
+
+
+def test_id_pointer_yields_reference(empty_file):
+    parent = bpy.data.objects.new("Parent", None)
+    child = bpy.data.objects.new("Child", None)
+    child.parent = parent
+
+    references = _walk(child)
+
+    assert ('parent', 'Object', 'Parent', 'objects') in references
+
+
+def test_read_only_nested_struct_is_walked(empty_file):
+    texture = bpy.data.textures.new("Noise", 'NOISE')
+    obj = bpy.data.objects.new("Field", None)
+    obj.field.texture = texture
+
+    references = _walk(obj)
+
+    # The type is the texture's subclass (NoiseTexture); check name and mapping
+    assert any(
+        ref[0] == 'texture' and ref[2] == 'Noise' and ref[3] == 'textures'
+        for ref in references
+    )
+
+
+def test_struct_sharing_owner_pointer_is_walked(empty_file):
+    receivers = bpy.data.collections.new("Receivers")
+    light = bpy.data.objects.new("Key", bpy.data.lights.new("Key", 'POINT'))
+    # Object.light_linking wraps the Object itself, so it shares its pointer
+    light.light_linking.receiver_collection = receivers
+
+    references = _walk(light)
+
+    assert ('receiver_collection', 'Collection', 'Receivers', 'collections') in references
+
+
+def test_read_only_id_pointers_are_not_references(empty_file):
+    obj = bpy.data.objects.new("Alone", None)
+
+    references = _walk(obj)
+
+    # ID.original points back at the object itself
+    assert not any(ref[2] == "Alone" for ref in references)
+
+
+def test_dump_keeps_special_handler_references(empty_file):
+    material = bpy.data.materials.new("Paint")
+    mesh = bpy.data.meshes.new("Body")
+    mesh.materials.append(material)
+    parent = bpy.data.objects.new("Parent", None)
+    obj = bpy.data.objects.new("Body", mesh)
+    obj.parent = parent
+
+    references = rna_analysis.dump_rna_references()['objects']['Body']['references']
+
+    # Special handler: material slots; generic walk: object data and parent
+    assert ('material_slots.material', 'Material', 'Paint', 'materials') in references
+    assert ('data', 'Mesh', 'Body', 'meshes') in references
+    assert ('parent', 'Object', 'Parent', 'objects') in references
+    assert len(references) == len(set(references))
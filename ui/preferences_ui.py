@@ -139,6 +139,9 @@ def copy_prefs_to_config(self, context):
     config.enable_debug_prints = \
         atomic_preferences.enable_debug_prints
 
+    config.enable_graph_cache = \
+        atomic_preferences.enable_graph_cache
+
     config.storage_navigate_frame_view = \
         atomic_preferences.storage_navigate_frame_view
 
@@ -257,6 +260,12 @@ class ATOMIC_PT_preferences_panel(bpy.types.AddonPreferences):
         default=False
     )
 
+    enable_graph_cache: bpy.props.BoolProperty(
+        description="Cache the data-block dependency graph on disk, so "
+                    "scans of an unchanged saved file skip rebuilding it",
+        default=False
+    )
+
     storage_navigate_frame_view: bpy.props.BoolProperty(
         name="Frame View on Storage Navigate",
         description="When clicking a storage index row, frame the user object "
@@ -310,6 +319,13 @@ class ATOMIC_PT_preferences_panel(bpy.types.AddonPreferences):
             text="Show Missing File Warning"
         )
 
+        # enable graph cache toggle
+        col.prop(
+            self,
+            "enable_graph_cache",
+            text="Cache Dependency Graph"
+        )
+
         # right column
         col = split.column()
 